@@ -1,9 +1,15 @@
 import pytesseract
 from PIL import Image
 import fitz  # PyMuPDF
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+from concurrent.futures import ThreadPoolExecutor
 import os
 
+# Scanned PDFs are rasterized a few pages at a time, so peak memory depends on
+# the chunk size rather than on the page count.
+OCR_CHUNK_PAGES = 4
+OCR_DPI = 200
+
 # Path to tesseract executable (only for Windows users)
 # Uncomment and update this path if needed:
 # pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
@@ -19,6 +25,36 @@ def extract_text_from_image(image_path):
         return f"Error reading image: {e}"
 
 
+def _render_pages(pdf_path, first_page, last_page):
+    """Rasterize a page range of a PDF."""
+    return convert_from_path(pdf_path, dpi=OCR_DPI, first_page=first_page, last_page=last_page)
+
+
+def ocr_pdf_pages(pdf_path, chunk_pages=OCR_CHUNK_PAGES):
+    """
+    Yield the OCR text of each page of a scanned PDF.
+    Pages are rendered in chunks of `chunk_pages`; chunk N+1 is rendered in a
+    background thread while chunk N is being OCR'd, so at most two chunks of
+    bitmaps are in memory at any time.
+    """
+    page_count = pdfinfo_from_path(pdf_path)["Pages"]
+    ranges = [(first, min(first + chunk_pages - 1, page_count))
+              for first in range(1, page_count + 1, chunk_pages)]
+    if not ranges:
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as renderer:
+        pending = renderer.submit(_render_pages, pdf_path, *ranges[0])
+        for i in range(len(ranges)):
+            images = pending.result()
+            if i + 1 < len(ranges):
+                pending = renderer.submit(_render_pages, pdf_path, *ranges[i + 1])
+            for img in images:
+                yield pytesseract.image_to_string(img)
+                img.close()
+            del images
+
+
 def extract_text_from_pdf(pdf_path):
     """Extract text from a PDF (using both direct text and OCR fallback)."""
     text = ""
@@ -31,9 +67,8 @@ def extract_text_from_pdf(pdf_path):
     # If text extraction fails (like in scanned PDFs), use OCR
     if not text.strip():
         print("No selectable text found — using OCR...")
-        images = convert_from_path(pdf_path)
-        for i, img in enumerate(images):
-            text += pytesseract.image_to_string(img)
+        for page_text in ocr_pdf_pages(pdf_path):
+            text += page_text
 
     return text.strip()
 
@@ -0,0 +1,102 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from extract import extract_text_from_image, extract_text_from_pdf
+from text_cleaning import extract_financial_summary
+from ratio_calc import calculate_ratios
+from ratio_analysis import analyze_ratios, overall_assessment
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp"}
+PDF_EXTENSIONS = {".pdf"}
+
+
+def extract_text(path):
+    """OCR an image, or read (with OCR fallback) a PDF."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PDF_EXTENSIONS:
+        return extract_text_from_pdf(path)
+    return extract_text_from_image(path)
+
+
+def run_pipeline(text):
+    """
+    Run cleaning -> ratios -> analysis fully in memory.
+    Returns a dict of DataFrames: summary, ratios and analysis.
+    """
+    summary_df = extract_financial_summary(text)
+    ratio_df = calculate_ratios(summary_df)
+    analysis_df = analyze_ratios(ratio_df)
+    return {"summary": summary_df, "ratios": ratio_df, "analysis": analysis_df}
+
+
+def process_document(path):
+    """Worker entry point: one image/PDF in, its pipeline DataFrames out."""
+    return run_pipeline(extract_text(path))
+
+
+def find_documents(input_dir):
+    """All images and PDFs under a directory, in a stable order."""
+    supported = IMAGE_EXTENSIONS | PDF_EXTENSIONS
+    paths = []
+    for root, _, files in os.walk(input_dir):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in supported:
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def export_to_excel(path, results, export_dir):
+    """Write one workbook per document with summary / ratios / analysis sheets."""
+    os.makedirs(export_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(path))[0]
+    output_file = os.path.join(export_dir, f"{base_name}_analysis.xlsx")
+    with pd.ExcelWriter(output_file) as writer:
+        for sheet_name, df in results.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+    return output_file
+
+
+def run_directory(input_dir, workers=None, export_dir=None):
+    """
+    Process every image/PDF under `input_dir` with a process pool.
+    Returns {path: results or Exception}; Excel is written only if `export_dir` is set.
+    """
+    paths = find_documents(input_dir)
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_document, path): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                print(f"❌ {path}: {e}")
+                results[path] = e
+                continue
+            if export_dir:
+                export_to_excel(path, results[path], export_dir)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCR-to-ratios pipeline over a directory of images/PDFs.")
+    parser.add_argument("input_dir", help="Directory containing statement images or PDFs")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--export", metavar="DIR", help="Also write one Excel workbook per document to DIR")
+    args = parser.parse_args()
+
+    all_results = run_directory(args.input_dir, args.workers, args.export)
+    for path, results in sorted(all_results.items()):
+        if isinstance(results, Exception):
+            continue
+        print(f"\n📄 {path}")
+        print(results["analysis"][["Ratio", "Comment"]])
+        print(overall_assessment(results["analysis"]))
+
+    ok = sum(not isinstance(r, Exception) for r in all_results.values())
+    print(f"\n✅ Processed {ok}/{len(all_results)} documents")
@@ -1,61 +1,71 @@
+import numpy as np
 import pandas as pd
 
-# Load the cleaned financial data
-df = pd.read_excel("financial_summary.xlsx")
-
-# Convert numeric columns to float
-for col in df.columns[1:]:
-    df[col] = pd.to_numeric(df[col], errors='coerce')
-
-# Helper to get metric values
-def get(metric):
-    row = df[df["Metric"] == metric]
-    return row.iloc[0, 1:].values if not row.empty else [None] * (len(df.columns) - 1)
-
-years = df.columns[1:]
-revenue = get("Net Sales (Revenue)")
-gross_profit = get("Gross Profit")
-operating_income = get("Operating Income (EBIT)")
-net_income = get("Net Income")
-cogs = get("Cost of Goods Sold (COGS)")
-ebt = get("Earnings Before Tax (EBT)")
-interest = get("Interest Expense")
-
-# 💰 Profitability Ratios
-profitability = {
-    "Gross Profit Margin (%)": [gp / rev * 100 if rev else None for gp, rev in zip(gross_profit, revenue)],
-    "Operating Profit Margin (%)": [op / rev * 100 if rev else None for op, rev in zip(operating_income, revenue)],
-    "Net Profit Margin (%)": [ni / rev * 100 if rev else None for ni, rev in zip(net_income, revenue)],
-    "Return on Sales (EBT/Revenue) (%)": [e / rev * 100 if rev else None for e, rev in zip(ebt, revenue)],
-}
-
-# 🧭 Stability Ratios (Operational efficiency / cost structure)
-stability = {
-    "COGS Ratio (%)": [c / rev * 100 if rev else None for c, rev in zip(cogs, revenue)],
-    "Operating Expense Ratio (%)": [
-        (rev - gp - op) / rev * 100 if rev and gp and op else None
-        for rev, gp, op in zip(revenue, gross_profit, operating_income)
-    ],
-}
-
-# 💸 Debt Ratios (based on Interest coverage etc.)
-debt = {
-    "Interest Coverage Ratio (EBIT/Interest)": [
-        op / abs(i) if i and i != 0 else None for op, i in zip(operating_income, interest)
-    ],
-    "Debt Service Ratio (EBT/Interest)": [
-        e / abs(i) if i and i != 0 else None for e, i in zip(ebt, interest)
-    ],
-}
-
-# Combine results
-all_ratios = {**profitability, **stability, **debt}
-ratio_df = pd.DataFrame(all_ratios, index=years).T.reset_index()
-ratio_df.rename(columns={"index": "Ratio"}, inplace=True)
-
-print("\n📊 FINANCIAL RATIOS\n")
-print(ratio_df)
-
-# Save to Excel
-#ratio_df.to_excel("financial_ratios.xlsx", index=False)
-print("\n✅ Saved as 'financial_ratios.xlsx'")
+# Summary metrics the ratios are built from (rows of financial_summary)
+RATIO_INPUTS = [
+    "Net Sales (Revenue)",
+    "Gross Profit",
+    "Operating Income (EBIT)",
+    "Net Income",
+    "Cost of Goods Sold (COGS)",
+    "Earnings Before Tax (EBT)",
+    "Interest Expense",
+]
+
+RATIO_NAMES = [
+    # 💰 Profitability Ratios
+    "Gross Profit Margin (%)",
+    "Operating Profit Margin (%)",
+    "Net Profit Margin (%)",
+    "Return on Sales (EBT/Revenue) (%)",
+    # 🧭 Stability Ratios (Operational efficiency / cost structure)
+    "COGS Ratio (%)",
+    "Operating Expense Ratio (%)",
+    # 💸 Debt Ratios (based on Interest coverage etc.)
+    "Interest Coverage Ratio (EBIT/Interest)",
+    "Debt Service Ratio (EBT/Interest)",
+]
+
+
+def calculate_ratios(summary_df):
+    """
+    Compute every ratio for every year in one vectorized pass.
+    Takes the Metric x Year summary DataFrame and returns a Ratio x Year
+    DataFrame; a ratio is NaN wherever its denominator is zero or missing.
+    """
+    years = list(summary_df.columns[1:])
+    metrics = summary_df.set_index("Metric")[years].apply(pd.to_numeric, errors="coerce")
+    revenue, gross_profit, operating_income, net_income, cogs, ebt, interest = (
+        metrics.reindex(RATIO_INPUTS).to_numpy(dtype=float)
+    )
+
+    # Operating expenses implied by the income statement (needs GP and EBIT)
+    implied_opex = np.where((gross_profit != 0) & (operating_income != 0),
+                            revenue - gross_profit - operating_income, np.nan)
+    interest = np.abs(interest)
+
+    numerators = np.vstack([gross_profit, operating_income, net_income, ebt, cogs, implied_opex,
+                            operating_income, ebt])
+    denominators = np.vstack([revenue, revenue, revenue, revenue, revenue, revenue,
+                              interest, interest])
+    scales = np.array([100, 100, 100, 100, 100, 100, 1, 1], dtype=float)[:, None]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(denominators != 0, numerators / denominators * scales, np.nan)
+
+    ratio_df = pd.DataFrame(values, index=RATIO_NAMES, columns=years).reset_index()
+    ratio_df.rename(columns={"index": "Ratio"}, inplace=True)
+    return ratio_df
+
+
+if __name__ == "__main__":
+    # Load the cleaned financial data
+    df = pd.read_excel("financial_summary.xlsx")
+    ratio_df = calculate_ratios(df)
+
+    print("\n📊 FINANCIAL RATIOS\n")
+    print(ratio_df)
+
+    # Save to Excel
+    #ratio_df.to_excel("financial_ratios.xlsx", index=False)
+    print("\n✅ Saved as 'financial_ratios.xlsx'")
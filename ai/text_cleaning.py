@@ -1,6 +1,6 @@
 import pandas as pd
 import re
-from extract import *
+from extract import extract_text_from_image
 
 # 🧾 Paste your OCR-extracted text here
 # text = """
@@ -25,7 +25,6 @@ from extract import *
 # Earnings per share:
 # Basic $ 11.86 $ 9.72 $ 9.70
 # """
-text=extract_text_from_image("/home/shubhankar/Downloads/Screenshot2024-09-01at2.45.30PM-a3919a880bbc472687252c4e1f4b2e98.png")
 
 # 🎯 1. Define the key metrics and their synonyms
 metric_map = {
@@ -41,65 +40,93 @@ metric_map = {
     "Earnings Per Share (EPS)": [r"earnings per share", r"eps"],
 }
 
-# 🎯 2. Extract years
-year_line = re.search(r'Year Ended.*?((?:19|20)\d{2}.*)', text)
-years = re.findall(r'(?:19|20)\d{2}', year_line.group(1)) if year_line else ["Value"]
 
-# 🎯 3. Extract lines containing numbers
-lines = [l.strip() for l in text.splitlines() if re.search(r'\d', l)]
-
-data = []
-
-for line in lines:
-    if 'Year Ended' in line:
-        continue
-
-    # Clean line and find numbers
-    clean_line = line.replace('§', '').replace('$', '').replace(',', '')
-    values = re.findall(r'\(?-?[\d\.]+\)?', clean_line)
-    if not values:
-        continue
-
-    # Extract metric (text before first number)
-    metric = re.split(r'\(?-?[\d\.]+\)?', clean_line, maxsplit=1)[0].strip(': ').lower()
-
-    # Convert numbers to floats
-    cleaned_vals = []
-    for v in values:
-        v = v.replace('(', '-').replace(')', '')
-        try:
-            cleaned_vals.append(float(v))
-        except ValueError:
+YEAR_LINE_RE = re.compile(r'Year Ended.*?((?:19|20)\d{2}.*)')
+YEAR_RE = re.compile(r'(?:19|20)\d{2}')
+DIGIT_RE = re.compile(r'\d')
+NUMBER_RE = re.compile(r'\(?-?[\d\.]+\)?')
+
+
+def compile_metric_matcher(metric_map):
+    """
+    Compile every synonym of every metric into one regex. Each metric gets an
+    optional lookahead group, so a single match() on a line reports all the
+    metrics it mentions (a line can match several, e.g. "provision for income
+    taxes" is both an income-tax and a tax-expense synonym).
+    Returns the compiled regex and the group name -> metric mapping.
+    """
+    lookaheads = []
+    group_names = {}
+    for i, (std_name, patterns) in enumerate(metric_map.items()):
+        group = f"m{i}"
+        group_names[group] = std_name
+        alternation = "|".join(f"(?:{p})" for p in patterns)
+        lookaheads.append(f"(?=(?:.*?(?P<{group}>{alternation}))?)")
+    return re.compile("".join(lookaheads)), group_names
+
+
+METRIC_MATCHER, METRIC_GROUPS = compile_metric_matcher(metric_map)
+
+
+def extract_financial_summary(text):
+    """Turn OCR-extracted statement text into a Metric x Year DataFrame."""
+    # 🎯 2. Extract years
+    year_line = YEAR_LINE_RE.search(text)
+    years = YEAR_RE.findall(year_line.group(1)) if year_line else ["Value"]
+
+    # 🎯 3 + 4. Classify each numeric line in one pass: the first line that
+    # mentions any synonym of a metric provides that metric's values
+    found = {}
+
+    for line in text.splitlines():
+        if not DIGIT_RE.search(line) or 'Year Ended' in line:
+            continue
+
+        # Clean line and find numbers
+        clean_line = line.strip().replace('§', '').replace('$', '').replace(',', '')
+        numbers = list(NUMBER_RE.finditer(clean_line))
+        if not numbers:
+            continue
+
+        # Extract metric (text before first number)
+        metric = clean_line[:numbers[0].start()].strip(': ').lower()
+        matched = [METRIC_GROUPS[g] for g, hit in METRIC_MATCHER.match(metric).groupdict().items()
+                   if hit is not None and METRIC_GROUPS[g] not in found]
+        if not matched:
+            continue
+
+        # Convert numbers to floats
+        cleaned_vals = []
+        for m in numbers:
+            v = m.group().replace('(', '-').replace(')', '')
+            try:
+                cleaned_vals.append(float(v))
+            except ValueError:
+                cleaned_vals.append(None)
+
+        # Pad values if needed
+        while len(cleaned_vals) < len(years):
             cleaned_vals.append(None)
 
-    # Pad values if needed
-    while len(cleaned_vals) < len(years):
-        cleaned_vals.append(None)
+        for std_name in matched:
+            found[std_name] = cleaned_vals[:len(years)]
+        if len(found) == len(metric_map):
+            break
 
-    data.append((metric, cleaned_vals))
+    # Keep the standard metric order, with placeholders for anything missing
+    final_data = [[std_name] + found.get(std_name, [None] * len(years)) for std_name in metric_map]
 
-# 🎯 4. Match extracted metrics to your desired standard list
-final_data = []
+    # 🎯 5. Create final DataFrame
+    return pd.DataFrame(final_data, columns=["Metric"] + years)
 
-for std_name, patterns in metric_map.items():
-    found = False
-    for metric, vals in data:
-        for pattern in patterns:
-            if re.search(pattern, metric):
-                final_data.append([std_name] + vals[:len(years)])
-                found = True
-                break
-        if found:
-            break
-    if not found:
-        final_data.append([std_name] + [None] * len(years))  # placeholder if missing
 
-# 🎯 5. Create final DataFrame
-df = pd.DataFrame(final_data, columns=["Metric"] + years)
+if __name__ == "__main__":
+    text = extract_text_from_image("/home/shubhankar/Downloads/Screenshot2024-09-01at2.45.30PM-a3919a880bbc472687252c4e1f4b2e98.png")
+    df = extract_financial_summary(text)
 
-# 🎯 6. Export to Excel and CSV
-df.to_excel("financial_summary.xlsx", index=False)
-df.to_csv("financial_summary.csv", index=False)
+    # 🎯 6. Export to Excel and CSV
+    df.to_excel("financial_summary.xlsx", index=False)
+    df.to_csv("financial_summary.csv", index=False)
 
-print(df)
-print("\n✅ Saved as 'financial_summary.xlsx' and 'financial_summary.csv'")
+    print(df)
+    print("\n✅ Saved as 'financial_summary.xlsx' and 'financial_summary.csv'")
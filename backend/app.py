@@ -1,27 +1,85 @@
 # backend/app.py
+import atexit
+import math
 import os
-from flask import Flask, request, jsonify
+import tempfile
+import time
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
 # --- Import the core processing logic ---
-from financial_processor import process_financial_document, _get_response_template
+from financial_processor import (
+    process_financial_document, reprocess_document, reprocess_documents, _get_response_template,
+    ANALYSIS_VERSION, REPROCESS_STAGES, STAGE_PARSE
+)
+from artifact_store import ArtifactStore
+from text_index import TextIndex, DEFAULT_SEARCH_LIMIT
+from deadline import Deadline
+from single_flight import SingleFlight
+from ocr_workers import OCRWorkerPool
+from financial_parser import LABEL_MATCH_MEMO
+from quarterly_analytics import QuarterlyAnalyticsEngine
+from time_series import build_series_payload, DEFAULT_AGGREGATION
+from chart_renderer import ChartRenderer, CHART_FORMATS, ratio_chart_specs
+from http_cache import (
+    ResultCache, build_json_response, compute_document_hash,
+    make_etag, parse_fields_param, select_fields
+)
 
 # --- Basic Setup ---
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["ETag"])
 
 # --- Configuration ---
 UPLOAD_FOLDER = 'uploads'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Default per-request processing budget (seconds); past it results are partial
+app.config['PROCESSING_DEADLINE_SECONDS'] = float(os.environ.get('FINSIGHT_DEADLINE_SECONDS', 120))
+# OCR worker processes for scanned pages (0 = OCR in the request thread)
+app.config['OCR_WORKERS'] = int(os.environ.get('FINSIGHT_OCR_WORKERS', 0))
+
+# Completed analyses, keyed by the SHA-256 of the uploaded document
+result_cache = ResultCache()
+# Extracted text and parsed records of every processed document
+artifact_store = ArtifactStore()
+# Positional inverted index over the extracted text of every processed page
+text_index = TextIndex()
+# Server-side ratio chart rendering (worker pool + cache by data hash)
+chart_renderer = ChartRenderer()
+# Concurrent uploads of the same document share a single pipeline run
+processing_flights = SingleFlight()
+# Scanned pages reach OCR workers through shared-memory raster slots
+ocr_pool = OCRWorkerPool(app.config['OCR_WORKERS']) if app.config['OCR_WORKERS'] > 0 else None
+if ocr_pool is not None:
+    atexit.register(ocr_pool.shutdown)
+# Rolling quarterly / TTM analytics per company, updated as filings arrive
+quarterly_engine = QuarterlyAnalyticsEngine()
 
 # --- API Endpoints ---
 @app.route('/api/process-document', methods=['POST'])
 def upload_and_process_file():
     """
     Handles file upload and calls the core processing pipeline.
+    Accepts an optional `fields` query parameter (e.g. `?fields=ai_analysis`),
+    `early_stop=1` to stop reading once every statement is parsed, and
+    `max_pages=N` to cap the number of pages processed, and `timeout=S` to
+    override the processing deadline (seconds); past it the result is partial.
     """
+    fields = parse_fields_param(request.args.get('fields'))
+    early_stop = request.args.get('early_stop', '').lower() in ('1', 'true', 'yes')
+    max_pages = request.args.get('max_pages', type=int)
+    if max_pages is not None and max_pages < 1:
+        return jsonify({"error": "max_pages must be a positive integer"}), 400
+    timeout = request.args.get('timeout', app.config['PROCESSING_DEADLINE_SECONDS'], type=float)
+    if timeout is not None and not (math.isfinite(timeout) and timeout > 0):
+        return jsonify({"error": "timeout must be a positive number of seconds"}), 400
+    try:
+        select_fields(_get_response_template(), fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     if 'file' not in request.files:
         return jsonify({"error": "No file part in the request"}), 400
     
@@ -30,22 +88,42 @@ def upload_and_process_file():
         return jsonify({"error": "No file selected for upload"}), 400
 
     filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    
+    # A unique name per request, so concurrent uploads of the same file never collide
+    fd, filepath = tempfile.mkstemp(suffix=os.path.splitext(filename)[1], dir=app.config['UPLOAD_FOLDER'])
+    os.close(fd)
+
     try:
         file.save(filepath)
+        document_hash = compute_document_hash(filepath)
 
-        # --- Call the core logic from the other file ---
-        analysis_result = process_financial_document(filepath, filename)
+        # --- Identical documents are only analysed once ---
+        analysis_result = result_cache.get(document_hash)
+        if analysis_result is None:
+            # --- Concurrent identical uploads wait on the first one's run ---
+            # Each caller waits at most until its own deadline; one whose budget
+            # outlasts the run it joined does not settle for a partial result.
+            deadline = Deadline(timeout)
+            flight_key = (document_hash, early_stop, max_pages)
+            while True:
+                analysis_result, shared = processing_flights.do(flight_key, lambda: _process_upload(
+                    filepath, filename, document_hash, early_stop, max_pages, deadline
+                ), timeout=deadline.remaining())
+                if not (shared and analysis_result.get("partial") and not deadline.expired()):
+                    break
 
-        # --- Check for processing errors within the structured response ---
-        if analysis_result.get("error"):
-            # A processing error occurred (e.g., parsing failed)
-            # We still return the full structure, but with an error code.
-            return jsonify(analysis_result), 422 # Unprocessable Entity
-        
-        # --- On success, return the full analysis ---
-        return jsonify(analysis_result), 200
+            # --- Check for processing errors within the structured response ---
+            if analysis_result.get("error"):
+                # A processing error occurred (e.g., parsing failed)
+                # We still return the full structure, but with an error code.
+                return build_json_response(select_fields(analysis_result, fields), 422) # Unprocessable Entity
+        if analysis_result["filename"] != filename:
+            analysis_result = {**analysis_result, "filename": filename}
+
+        # --- On success, return the (selected) analysis ---
+        return build_json_response(
+            select_fields(analysis_result, fields), 200,
+            etag=_result_etag(analysis_result, document_hash, fields)
+        )
 
     except Exception as e:
         # This catches server-level errors (e.g., disk full, unexpected crashes)
@@ -61,6 +139,245 @@ def upload_and_process_file():
             os.remove(filepath)
             print(f"INFO: Cleaned up temporary file '{filename}'.")
 
+def _process_upload(filepath, filename, document_hash, early_stop, max_pages, deadline):
+    """Runs the core pipeline on a saved upload and caches complete results."""
+    # --- Call the core logic from the other file ---
+    analysis_result = process_financial_document(
+        filepath, filename, document_id=document_hash, store=artifact_store,
+        early_stop=early_stop, max_pages=max_pages, deadline=deadline, ocr_pool=ocr_pool,
+        index=text_index
+    )
+    analysis_result["document_id"] = document_hash
+    _cache_result(document_hash, analysis_result)
+    return analysis_result
+
+def _cache_result(document_id, analysis_result):
+    """Caches complete results only; a partial one covers part of the document."""
+    if not analysis_result.get("error") and not analysis_result.get("partial"):
+        result_cache.put(document_id, analysis_result)
+
+def _result_etag(analysis_result, document_id, fields):
+    """
+    ETag of a result representation, or None for partial results: a client
+    must not revalidate a partial body into a complete one with a 304.
+    """
+    if analysis_result.get("partial"):
+        return None
+    return make_etag(document_id, fields, ANALYSIS_VERSION)
+
+def _load_result(document_id):
+    """
+    Returns the cached analysis of a document, rebuilding it from stored
+    artifacts if needed (instead of asking for a re-upload), or None.
+    """
+    analysis_result = result_cache.get(document_id)
+    if analysis_result is None and artifact_store.has_document(document_id):
+        analysis_result = reprocess_document(document_id, artifact_store, STAGE_PARSE, text_index)
+        _cache_result(document_id, analysis_result)
+    return analysis_result
+
+@app.route('/api/results/<document_id>', methods=['GET'])
+def get_result(document_id):
+    """
+    Returns a previously computed analysis. Supports `fields` selection,
+    compression negotiation and conditional GETs via `If-None-Match`.
+    """
+    analysis_result = _load_result(document_id)
+    if analysis_result is None:
+        return jsonify({"error": "No analysis found for this document. Please upload it again."}), 404
+    if analysis_result.get("error"):
+        return build_json_response(analysis_result, 422)
+
+    fields = parse_fields_param(request.args.get('fields'))
+    try:
+        payload = select_fields(analysis_result, fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return build_json_response(
+        payload, 200, etag=_result_etag(analysis_result, document_id, fields),
+        cache=result_cache, cache_key=document_id
+    )
+
+@app.route('/api/results/<document_id>/series', methods=['GET'])
+def get_series(document_id):
+    """
+    Returns the parsed metrics as columnar arrays per period type, ready for
+    charting. Query: `metrics` and `period_types` (comma-separated),
+    `max_points` to downsample long histories into buckets, and `agg`
+    (last, mean, sum, min, max) to aggregate each bucket.
+    """
+    analysis_result = _load_result(document_id)
+    if analysis_result is None or analysis_result.get("error"):
+        return jsonify({"error": "No analysis found for this document. Please upload it again."}), 404
+
+    metrics = parse_fields_param(request.args.get('metrics'))
+    period_types = parse_fields_param(request.args.get('period_types'))
+    max_points = request.args.get('max_points', type=int)
+    if max_points is not None and max_points < 1:
+        return jsonify({"error": "max_points must be a positive integer"}), 400
+    aggregation = request.args.get('agg', DEFAULT_AGGREGATION)
+    try:
+        series = build_series_payload(
+            analysis_result["raw_parsed_data"], metrics, period_types, max_points, aggregation
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The query is part of the representation, so each variant is cached separately
+    variant = [f"series:{metrics}:{period_types}:{max_points}:{aggregation}"]
+    return build_json_response(
+        {"document_id": document_id, "series": series, "partial": analysis_result["partial"]}, 200,
+        etag=_result_etag(analysis_result, document_id, variant),
+        cache=result_cache, cache_key=document_id
+    )
+
+@app.route('/api/results/<document_id>/charts', methods=['GET'])
+def list_charts(document_id):
+    """
+    Renders (in parallel, cached by data hash) one chart per profitability
+    ratio of a document and returns their URLs. `format` is png or svg.
+    """
+    analysis_result = _load_result(document_id)
+    if analysis_result is None or analysis_result.get("error"):
+        return jsonify({"error": "No analysis found for this document. Please upload it again."}), 404
+
+    fmt = request.args.get('format', 'png')
+    if fmt not in CHART_FORMATS:
+        return jsonify({"error": f"Unsupported chart format '{fmt}'"}), 400
+
+    specs = ratio_chart_specs(analysis_result["profitability_ratios"])
+    chart_renderer.render_many(list(specs.values()), fmt)
+    return jsonify({
+        "document_id": document_id,
+        "charts": [
+            {"metric": spec[0], "url": f"/api/results/{document_id}/charts/{slug}.{fmt}"}
+            for slug, spec in specs.items()
+        ]
+    }), 200
+
+@app.route('/api/results/<document_id>/charts/<slug>.<fmt>', methods=['GET'])
+def get_chart(document_id, slug, fmt):
+    """Serves one rendered ratio chart as PNG or SVG, with ETag revalidation."""
+    analysis_result = _load_result(document_id)
+    if analysis_result is None or analysis_result.get("error"):
+        return jsonify({"error": "No analysis found for this document. Please upload it again."}), 404
+    if fmt not in CHART_FORMATS:
+        return jsonify({"error": f"Unsupported chart format '{fmt}'"}), 400
+
+    spec = ratio_chart_specs(analysis_result["profitability_ratios"]).get(slug)
+    if spec is None:
+        return jsonify({"error": f"No chart '{slug}' for this document."}), 404
+
+    key, body = chart_renderer.render(spec, fmt)
+    response = Response(body, mimetype=CHART_FORMATS[fmt])
+    response.set_etag(key)
+    response.headers["Cache-Control"] = "public, max-age=86400"
+    return response.make_conditional(request)
+
+@app.route('/api/companies/<company_id>/quarters', methods=['POST'])
+def ingest_quarters(company_id):
+    """
+    Adds quarterly filings to a company's series and returns its updated analytics.
+    JSON body: {"periods": [{"year": 2022, "quarter": 4, "metrics": {...}}
+                            | {"document_id": "...", "quarter": 4}, ...]}
+    A document reference contributes every "three months ended" column the
+    parser found in that processed document, as the given fiscal quarter.
+    """
+    payload = request.get_json(silent=True) or {}
+    periods = []
+    for entry in payload.get("periods", []):
+        if not isinstance(entry, dict) or "quarter" not in entry:
+            return jsonify({"error": "Each period needs a 'quarter' and either 'year'/'metrics' or 'document_id'."}), 400
+        if "document_id" in entry:
+            analysis_result = _load_result(entry["document_id"])
+            if analysis_result is None or analysis_result.get("error"):
+                return jsonify({"error": f"No analysis found for document '{entry['document_id']}'."}), 404
+            periods += [
+                (record["year"], entry["quarter"], {k: v for k, v in record.items() if k not in ("year", "period_type")})
+                for record in analysis_result["raw_parsed_data"] if record["period_type"] == "quarter"
+            ]
+        elif "year" in entry:
+            periods.append((entry["year"], entry["quarter"], entry.get("metrics", {})))
+        else:
+            return jsonify({"error": "Each period needs a 'quarter' and either 'year'/'metrics' or 'document_id'."}), 400
+
+    try:
+        quarterly_engine.ingest(company_id, periods)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"company_id": company_id, "quarters": quarterly_engine.analytics(company_id)}), 200
+
+@app.route('/api/companies/<company_id>/quarters', methods=['GET'])
+def get_quarters(company_id):
+    """Returns TTM totals, QoQ / YoY changes and running averages (`last=N` quarters)."""
+    if not quarterly_engine.has_company(company_id):
+        return jsonify({"error": f"No quarterly data for company '{company_id}'."}), 404
+    last = request.args.get('last', type=int)
+    return jsonify({"company_id": company_id, "quarters": quarterly_engine.analytics(company_id, last)}), 200
+
+@app.route('/api/reprocess', methods=['POST'])
+def reprocess_stored_documents():
+    """
+    Re-runs downstream stages over stored artifacts, without re-extraction.
+    JSON body: {"stage": "parse" | "analyze", "document_ids": [...] (optional)}
+    """
+    payload = request.get_json(silent=True) or {}
+    stage = payload.get("stage", STAGE_PARSE)
+    if stage not in REPROCESS_STAGES:
+        return jsonify({"error": f"Unknown stage '{stage}'. Expected one of: {', '.join(REPROCESS_STAGES)}"}), 400
+
+    document_ids = payload.get("document_ids")
+    failed = []
+    if document_ids is not None:
+        failed = [{"document_id": d, "error": "Unknown document."}
+                  for d in document_ids if not artifact_store.has_document(d)]
+        document_ids = [d for d in document_ids if artifact_store.has_document(d)]
+
+    start_time = time.perf_counter()
+    results = reprocess_documents(artifact_store, stage, document_ids, text_index)
+    for document_id, analysis_result in results.items():
+        if analysis_result.get("error"):
+            failed.append({"document_id": document_id, "error": analysis_result["error"]})
+        else:
+            _cache_result(document_id, analysis_result)
+
+    return jsonify({
+        "stage": stage,
+        "processed": len(results) - sum(1 for r in results.values() if r.get("error")),
+        "failed": failed,
+        "elapsed_seconds": round(time.perf_counter() - start_time, 3)
+    }), 200
+
+@app.route('/api/search', methods=['GET'])
+def search_documents():
+    """
+    Finds processed documents whose extracted text contains a phrase, and the
+    pages it appears on. Query: `q` (required) and `limit` (default 100).
+    """
+    phrase = request.args.get('q', '').strip()
+    if not phrase:
+        return jsonify({"error": "Missing search phrase 'q'"}), 400
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    if limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+
+    start_time = time.perf_counter()
+    results = text_index.search(phrase, limit)
+    return jsonify({
+        "query": phrase,
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 3)
+    }), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Processing counters: coalesced uploads and fuzzy label memo hit rates."""
+    return jsonify({
+        "processing": processing_flights.stats(),
+        "label_memo": LABEL_MATCH_MEMO.stats(),
+    }), 200
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """A simple health check endpoint."""
@@ -0,0 +1,141 @@
+# backend/artifact_store.py
+
+import glob
+import hashlib
+import inspect
+import json
+import os
+import re
+import tempfile
+from typing import Any, Dict, List, Optional
+
+# ==============================================================================
+# CONFIGURATION & CONSTANTS
+# ==============================================================================
+
+ARTIFACT_ROOT = os.environ.get("FINSIGHT_ARTIFACT_DIR", "artifacts")
+
+EXTRACTED_TEXT = "extracted_text"
+PARSED_RECORDS = "parsed_records"
+METADATA_FILE = "metadata.json"
+DOCUMENT_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# ==============================================================================
+# STAGE VERSIONING
+# ==============================================================================
+
+def stage_version(*modules) -> str:
+    """
+    Fingerprints the source code of the modules implementing a pipeline stage.
+    Any edit to those modules (aliases, thresholds, logic) yields a new version.
+    """
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(inspect.getsource(module).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+# ==============================================================================
+# ARTIFACT STORE
+# ==============================================================================
+
+class ArtifactStore:
+    """
+    On-disk store of intermediate pipeline artifacts, one directory per
+    document hash. Every artifact is tagged with the version of the stage
+    that produced it, so downstream stages can be re-run over stored inputs:
+
+        artifacts/<document_id>/metadata.json
+        artifacts/<document_id>/extracted_text.<version>.txt
+        artifacts/<document_id>/parsed_records.<version>.json
+    """
+    def __init__(self, root: str = ARTIFACT_ROOT):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _document_dir(self, document_id: str) -> str:
+        if not DOCUMENT_ID_PATTERN.fullmatch(document_id):
+            raise ValueError(f"Invalid document id: {document_id!r}")
+        return os.path.join(self.root, document_id)
+
+    def _artifact_path(self, document_id: str, kind: str, version: str, ext: str) -> str:
+        return os.path.join(self._document_dir(document_id), f"{kind}.{version}.{ext}")
+
+    @staticmethod
+    def _write_atomic(path: str, content: str) -> None:
+        """
+        Writes via a temporary file so readers never see a partial artifact.
+        Each writer gets its own temporary file, so concurrent writers of the
+        same artifact never interleave; the last replace wins.
+        """
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _latest(self, document_id: str, kind: str, ext: str) -> Optional[str]:
+        """Returns the most recently written artifact of a kind, any version."""
+        pattern = os.path.join(self._document_dir(document_id), f"{kind}.*.{ext}")
+        candidates = glob.glob(pattern)
+        return max(candidates, key=os.path.getmtime) if candidates else None
+
+    # --- Documents ---
+
+    def list_documents(self) -> List[str]:
+        """Returns the ids of all documents that have stored artifacts."""
+        return sorted(
+            name for name in os.listdir(self.root)
+            if DOCUMENT_ID_PATTERN.fullmatch(name) and os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def has_document(self, document_id: str) -> bool:
+        return bool(DOCUMENT_ID_PATTERN.fullmatch(document_id)) and os.path.isdir(self._document_dir(document_id))
+
+    def save_metadata(self, document_id: str, metadata: Dict[str, Any]) -> None:
+        path = os.path.join(self._document_dir(document_id), METADATA_FILE)
+        self._write_atomic(path, json.dumps(metadata))
+
+    def load_metadata(self, document_id: str) -> Dict[str, Any]:
+        path = os.path.join(self._document_dir(document_id), METADATA_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    # --- Extracted text ---
+
+    def save_text(self, document_id: str, version: str, text: str) -> None:
+        self._write_atomic(self._artifact_path(document_id, EXTRACTED_TEXT, version, "txt"), text)
+
+    def load_text(self, document_id: str, version: Optional[str] = None) -> Optional[str]:
+        """Loads the extracted text of a given version, or the latest if None."""
+        if version is None:
+            path = self._latest(document_id, EXTRACTED_TEXT, "txt")
+        else:
+            path = self._artifact_path(document_id, EXTRACTED_TEXT, version, "txt")
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    # --- Parsed records ---
+
+    def save_parsed(self, document_id: str, version: str, records: List[Dict[str, Any]]) -> None:
+        self._write_atomic(self._artifact_path(document_id, PARSED_RECORDS, version, "json"), json.dumps(records))
+
+    def load_parsed(self, document_id: str, version: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Loads the parsed records of a given version, or the latest if None."""
+        if version is None:
+            path = self._latest(document_id, PARSED_RECORDS, "json")
+        else:
+            path = self._artifact_path(document_id, PARSED_RECORDS, version, "json")
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
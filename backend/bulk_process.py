@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Processes a whole directory tree of filings offline, in parallel, appending
+one JSON line per document to an output file. The output doubles as the
+checkpoint: re-running the same command skips documents already recorded,
+so an interrupted backfill resumes where it left off. Each record's status
+is "ok", "partial" (cut short by --timeout or --max-pages) or "error".
+
+Usage:
+    python bulk_process.py INPUT_DIR OUTPUT.jsonl [--workers N] [--artifacts DIR]
+                           [--early-stop] [--max-pages N] [--timeout S]
+                           [--retry-failed] [--retry-partial]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, Optional, Set
+
+from artifact_store import ArtifactStore
+from deadline import Deadline
+from financial_processor import process_financial_document
+from http_cache import compute_document_hash
+from text_extractor import TextExtractor
+
+SUPPORTED_EXTENSIONS = frozenset(TextExtractor().extractors)
+PROGRESS_EVERY_SECONDS = 5.0
+
+STATUS_OK = "ok"
+STATUS_PARTIAL = "partial"
+STATUS_ERROR = "error"
+
+# ==============================================================================
+# DISCOVERY & CHECKPOINT
+# ==============================================================================
+
+def find_documents(input_dir: str) -> Iterator[str]:
+    """Supported files under `input_dir`, as sorted paths relative to it."""
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                yield os.path.relpath(os.path.join(root, name), input_dir)
+
+
+def load_checkpoint(output_path: str, retry_statuses: Set[str]) -> Set[str]:
+    """
+    Paths already recorded in the output file, except those whose status is
+    to be retried. A line cut short by an interrupted run is ignored (and
+    that document processed again).
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") in retry_statuses:
+                continue
+            done.add(record["path"])
+    return done
+
+
+def _open_output(output_path: str):
+    """Opens the output for appending, terminating any truncated last line first."""
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    needs_newline = False
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    output = open(output_path, "a", encoding="utf-8")
+    if needs_newline:
+        output.write("\n")
+    return output
+
+# ==============================================================================
+# WORKER
+# ==============================================================================
+
+def process_one(input_dir: str, relative_path: str, artifact_dir: Optional[str], early_stop: bool,
+                max_pages: Optional[int], timeout: Optional[float]) -> Dict[str, Any]:
+    """Worker entry point: one file in, one JSONL record out (never raises)."""
+    start_time = time.perf_counter()
+    record = {"path": relative_path}
+    try:
+        filepath = os.path.join(input_dir, relative_path)
+        document_id = compute_document_hash(filepath)
+        store = ArtifactStore(artifact_dir) if artifact_dir else None
+        result = process_financial_document(
+            filepath, os.path.basename(relative_path), document_id=document_id, store=store,
+            early_stop=early_stop, max_pages=max_pages, deadline=Deadline(timeout)
+        )
+        result["document_id"] = document_id
+        if result.get("error"):
+            status = STATUS_ERROR
+        elif result.get("partial"):
+            status = STATUS_PARTIAL
+        else:
+            status = STATUS_OK
+        record.update(document_id=document_id, status=status, result=result)
+    except Exception as e:
+        record.update(status=STATUS_ERROR, result={"error": f"An unexpected error occurred: {str(e)}"})
+    record["elapsed_seconds"] = round(time.perf_counter() - start_time, 3)
+    return record
+
+# ==============================================================================
+# PROGRESS
+# ==============================================================================
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+def _report_progress(completed: int, total: int, failed: int, partial: int, start_time: float) -> None:
+    elapsed = time.perf_counter() - start_time
+    rate = completed / elapsed if elapsed > 0 else 0.0
+    eta = (total - completed) / rate if rate > 0 else 0.0
+    print(f"[{completed}/{total}] {rate:.2f} docs/s, {failed} failed, {partial} partial, "
+          f"elapsed {_format_duration(elapsed)}, ETA {_format_duration(eta)}", flush=True)
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="Bulk-process a directory tree of filings into JSONL.")
+    arg_parser.add_argument("input_dir", help="Directory to walk for supported documents")
+    arg_parser.add_argument("output", help="JSONL file to append results to (also the resume checkpoint)")
+    arg_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    arg_parser.add_argument("--artifacts", help="Also store extracted text and parsed records in this artifact store")
+    arg_parser.add_argument("--early-stop", action="store_true", help="Stop reading once every statement is parsed")
+    arg_parser.add_argument("--max-pages", type=int, default=None, help="Process at most N pages per document")
+    arg_parser.add_argument("--timeout", type=float, default=None, help="Per-document processing deadline (seconds)")
+    arg_parser.add_argument("--retry-failed", action="store_true", help="Re-run documents previously recorded as failed")
+    arg_parser.add_argument("--retry-partial", action="store_true",
+                            help="Re-run documents previously cut short by --timeout or --max-pages")
+    args = arg_parser.parse_args()
+
+    retry_statuses = set()
+    if args.retry_failed:
+        retry_statuses.add(STATUS_ERROR)
+    if args.retry_partial:
+        retry_statuses.add(STATUS_PARTIAL)
+    done = load_checkpoint(args.output, retry_statuses)
+    pending = [path for path in find_documents(args.input_dir) if path not in done]
+    print(f"Found {len(pending) + len(done)} documents, {len(done)} already done, {len(pending)} to process.")
+    if not pending:
+        return 0
+
+    completed = failed = partial = 0
+    start_time = last_report = time.perf_counter()
+    with _open_output(args.output) as output, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [
+            pool.submit(process_one, args.input_dir, path, args.artifacts,
+                        args.early_stop, args.max_pages, args.timeout)
+            for path in pending
+        ]
+        try:
+            for future in as_completed(futures):
+                record = future.result()
+                output.write(json.dumps(record, separators=(",", ":")) + "\n")
+                output.flush()
+                completed += 1
+                if record["status"] == STATUS_ERROR:
+                    failed += 1
+                    print(f"❌ {record['path']}: {record['result'].get('error')}")
+                elif record["status"] == STATUS_PARTIAL:
+                    partial += 1
+                    print(f"⚠️ {record['path']}: partial, skipped {', '.join(record['result']['processing']['skipped_stages'])}")
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_EVERY_SECONDS or completed == len(pending):
+                    _report_progress(completed, len(pending), failed, partial, start_time)
+                    last_report = now
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            print(f"\nInterrupted after {completed}/{len(pending)} documents; re-run the same command to resume.")
+            return 130
+
+    print(f"✅ Processed {completed - failed}/{completed} documents ({partial} partial) "
+          f"in {_format_duration(time.perf_counter() - start_time)}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# backend/chart_renderer.py
+
+import hashlib
+import io
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# The Agg canvas is headless; figures are built with the object-oriented API
+# and never registered with pyplot, so nothing accumulates between renders.
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# ==============================================================================
+# CONFIGURATION & CONSTANTS
+# ==============================================================================
+
+CHART_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+CHART_WORKERS = 2
+CHART_CACHE_SIZE = 256
+CHART_SIZE_INCHES = (6.4, 4.0)
+CHART_DPI = 100
+
+# A chart request: (title, x labels, values)
+ChartSpec = Tuple[str, Sequence[str], Sequence[float]]
+
+# ==============================================================================
+# RENDERING
+# ==============================================================================
+
+def render_bar_chart(title: str, labels: Sequence[str], values: Sequence[float], fmt: str = "png") -> bytes:
+    """Renders a single bar chart to PNG or SVG bytes."""
+    fig = Figure(figsize=CHART_SIZE_INCHES, dpi=CHART_DPI)
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_subplot()
+        ax.bar([str(label) for label in labels], values)
+        ax.set_title(f"{title} Across Years")
+        ax.set_xlabel("Year")
+        ax.set_ylabel(title)
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt)
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def chart_key(spec: ChartSpec, fmt: str) -> str:
+    """Content hash of a chart's data; identical data always renders identically."""
+    title, labels, values = spec
+    payload = json.dumps([title, [str(l) for l in labels], list(values), fmt])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def ratio_chart_specs(profitability_ratios: List[Dict]) -> Dict[str, ChartSpec]:
+    """
+    Groups the processor's `profitability_ratios` entries into one chart per
+    metric, keyed by a URL-safe slug (e.g. "net_profit_margin").
+    """
+    grouped: Dict[str, Dict[int, float]] = OrderedDict()
+    for ratio in profitability_ratios:
+        try:
+            value = float(str(ratio["value"]).strip('%'))
+        except (ValueError, KeyError):
+            continue
+        grouped.setdefault(ratio["metric"], {})[ratio.get("year")] = value
+
+    specs = {}
+    for metric, by_year in grouped.items():
+        years = sorted(by_year)
+        slug = re.sub(r"[^a-z0-9]+", "_", metric.lower()).strip("_")
+        specs[slug] = (metric, years, [by_year[y] for y in years])
+    return specs
+
+# ==============================================================================
+# RENDERING SERVICE
+# ==============================================================================
+
+class ChartRenderer:
+    """
+    Renders charts on a process pool and caches the bytes by data hash, so a
+    chart is drawn once no matter how many documents or requests share it.
+    """
+    def __init__(self, workers: int = CHART_WORKERS, cache_size: int = CHART_CACHE_SIZE):
+        self.workers = workers
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _cache_get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+            return body
+
+    def _cache_put(self, key: str, body: bytes) -> None:
+        with self._lock:
+            self._cache[key] = body
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def render_many(self, specs: Sequence[ChartSpec], fmt: str = "png") -> List[Tuple[str, bytes]]:
+        """Renders several charts in parallel; returns (cache key, bytes) in input order."""
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f"Unsupported chart format '{fmt}'. Expected one of: {', '.join(CHART_FORMATS)}")
+        keys = [chart_key(spec, fmt) for spec in specs]
+        bodies = {key: self._cache_get(key) for key in keys}
+        missing = {key: spec for key, spec in zip(keys, specs) if bodies[key] is None}
+
+        if missing:
+            pool = self._get_pool()
+            futures = {key: pool.submit(render_bar_chart, *spec, fmt) for key, spec in missing.items()}
+            for key, future in futures.items():
+                bodies[key] = future.result()
+                self._cache_put(key, bodies[key])
+
+        return [(key, bodies[key]) for key in keys]
+
+    def render(self, spec: ChartSpec, fmt: str = "png") -> Tuple[str, bytes]:
+        return self.render_many([spec], fmt)[0]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
@@ -0,0 +1,29 @@
+# backend/deadline.py
+
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    A per-request time budget that is passed down through extraction, OCR and
+    parsing. A deadline created with `seconds=None` never expires.
+    """
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self._expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (negative once overrun), or None for an unlimited deadline."""
+        if self._expires_at is None:
+            return None
+        return self._expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def overrun_by(self, grace: float) -> bool:
+        """True once the deadline has been exceeded by more than `grace` seconds."""
+        remaining = self.remaining()
+        return remaining is not None and remaining < -grace
@@ -13,7 +13,10 @@ def load_financial_data(filepath):
         return None
 
 def analyze_profitability(data):
-    """Calculates key profitability ratios for annual periods."""
+    """
+    Calculates key profitability ratios for annual periods.
+    `data` may hold period dicts or PeriodRecords (same mapping-style access).
+    """
     
     insights = []
     
@@ -58,7 +61,10 @@ def analyze_profitability(data):
     return insights
 
 def analyze_yoy_growth(data):
-    """Calculates Year-over-Year growth for key metrics."""
+    """
+    Calculates Year-over-Year growth for key metrics.
+    `data` may hold period dicts or PeriodRecords (same mapping-style access).
+    """
     insights = []
     
     annual_data = sorted([d for d in data if d['period_type'] == 'annual'], key=lambda x: x['year'])
@@ -1,6 +1,14 @@
 import re
+import os
 import json
-from collections import defaultdict
+import math
+import atexit
+import hashlib
+import tempfile
+import threading
+from array import array
+from collections import defaultdict, OrderedDict
+from functools import lru_cache
 from thefuzz import process
 
 INCOME_STATEMENT_ALIASES = {
@@ -27,16 +35,182 @@ CASH_FLOW_ALIASES = {
     'cash_at_end_of_period': ['Cash, cash equivalents and restricted cash, ending balances'],
 }
 
+# Fixed metric schema of a parsed period: every canonical key, in statement order
+METRIC_SCHEMA = tuple(dict.fromkeys([*INCOME_STATEMENT_ALIASES, *BALANCE_SHEET_ALIASES, *CASH_FLOW_ALIASES]))
+_METRIC_INDEX = {metric: i for i, metric in enumerate(METRIC_SCHEMA)}
+_MISSING = math.nan
+_ABSENT = object()
+
+
+class PeriodRecord:
+    """
+    Compact parsed period: the year and period type plus one float per metric
+    of METRIC_SCHEMA in a packed array (NaN = not reported). Avoids a dict and
+    a float object per metric when large numbers of periods are held in memory.
+
+    Supports the read-only mapping access used by the analyzer (`record['year']`,
+    `record.get('net_income')`), and converts to and from the JSON dict shape.
+    """
+    __slots__ = ("year", "period_type", "values")
+
+    def __init__(self, year, period_type, values=None):
+        self.year = year
+        self.period_type = period_type
+        self.values = values if values is not None else array('d', [_MISSING] * len(METRIC_SCHEMA))
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls(int(data['year']), data['period_type'])
+        for metric, index in _METRIC_INDEX.items():
+            value = data.get(metric)
+            if value is not None:
+                record.values[index] = value
+        return record
+
+    def to_dict(self):
+        data = {'year': self.year, 'period_type': self.period_type}
+        for metric, value in zip(METRIC_SCHEMA, self.values):
+            if not math.isnan(value):
+                data[metric] = value
+        return data
+
+    def get(self, key, default=None):
+        if key == 'year': return self.year
+        if key == 'period_type': return self.period_type
+        index = _METRIC_INDEX.get(key)
+        if index is None: return default
+        value = self.values[index]
+        return default if math.isnan(value) else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _ABSENT)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, metric, value):
+        self.values[_METRIC_INDEX[metric]] = value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __eq__(self, other):
+        if not isinstance(other, PeriodRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"PeriodRecord({self.to_dict()!r})"
+
+
+# Statement sections in document order:
+# (name, start pattern, end pattern or None for end-of-text, aliases, first data row keywords)
+STATEMENT_SECTIONS = [
+    ("Income Statement", r'STATEMENTS\s+OF\s+OPERATIONS', r'BALANCE\s+SHEETS', INCOME_STATEMENT_ALIASES, ['Net sales:']),
+    ("Balance Sheet", r'BALANCE\s+SHEETS', r'STATEMENTS\s+OF\s+CASH\s+FLOWS', BALANCE_SHEET_ALIASES, ['Current assets:']),
+    ("Cash Flow", r'STATEMENTS\s+OF\s+CASH\s+FLOWS', None, CASH_FLOW_ALIASES, ['Operating activities:']),
+]
+
+LABEL_MEMO_SIZE = 50_000
+# Optional JSON file the label memo is loaded from at import and saved to at exit
+LABEL_MEMO_PATH = os.environ.get("FINSIGHT_LABEL_MEMO_PATH")
+
+
+@lru_cache(maxsize=64)
+def _fingerprint_aliases(frozen_aliases):
+    payload = json.dumps(frozen_aliases, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def alias_fingerprint(aliases_dict):
+    """Stable content hash of an alias dictionary; any edit to it changes the hash."""
+    return _fingerprint_aliases(tuple((key, tuple(aliases)) for key, aliases in aliases_dict.items()))
+
+
+class LabelMatchMemo:
+    """
+    Process-wide LRU memo of fuzzy label matches, keyed by
+    (alias fingerprint, score cutoff, normalized label). Keying on the
+    fingerprint means an edited alias dictionary simply stops hitting its
+    old entries, which then age out. Misses (None) are memoized too.
+    """
+    def __init__(self, max_size=LABEL_MEMO_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, canonical_key):
+        with self._lock:
+            self._entries[key] = canonical_key
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def load(self, path):
+        """Loads entries saved by `save`, keeping only those of the current alias dictionaries."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        current = {alias_fingerprint(aliases) for _, _, _, aliases, _ in STATEMENT_SECTIONS}
+        for fingerprint, cutoff, label, canonical_key in saved:
+            if fingerprint in current:
+                self.put((fingerprint, cutoff, label), canonical_key)
+
+    def save(self, path):
+        with self._lock:
+            entries = [[*key, canonical_key] for key, canonical_key in self._entries.items()]
+        # A unique temporary file per writer: several worker processes may save at exit
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp",
+                                        dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+LABEL_MATCH_MEMO = LabelMatchMemo()
+if LABEL_MEMO_PATH:
+    LABEL_MATCH_MEMO.load(LABEL_MEMO_PATH)
+    atexit.register(LABEL_MATCH_MEMO.save, LABEL_MEMO_PATH)
+
+
+def detect_multiplier(text):
+    """The scale a document states its amounts in ("in millions", "in thousands")."""
+    if 'in millions' in text.lower(): return 1_000_000
+    if 'in thousands' in text.lower(): return 1_000
+    return 1
+
+
 class FinancialStatementParser:
-    def __init__(self, text):
+    def __init__(self, text, multiplier=None):
+        # `multiplier` is given when `text` is an excerpt of a document whose
+        # scale is stated elsewhere (e.g. in front matter that was left out)
         self.text = text
-        self.multiplier = self._get_multiplier()
+        self.multiplier = self._get_multiplier() if multiplier is None else multiplier
         self.parsed_data = defaultdict(dict)
 
     def _get_multiplier(self):
-        if 'in millions' in self.text.lower(): return 1_000_000
-        if 'in thousands' in self.text.lower(): return 1_000
-        return 1
+        return detect_multiplier(self.text)
 
     def _clean_and_convert_value(self, value_str):
         if not isinstance(value_str, str): return None
@@ -57,12 +231,18 @@ class FinancialStatementParser:
         line_text_match = re.match(r'([A-Za-z,\s\(\)/]+[A-Za-z\)])', line)
         if not line_text_match: return None
         line_text = line_text_match.group(1).strip().lower()
+        memo_key = (alias_fingerprint(aliases_dict), score_cutoff, line_text)
+        canonical_key = LABEL_MATCH_MEMO.get(memo_key, _ABSENT)
+        if canonical_key is not _ABSENT:
+            return canonical_key
         best_match_key, highest_score = None, 0
         for key, aliases in aliases_dict.items():
             match, score = process.extractOne(line_text, [a.lower() for a in aliases])
             if score > highest_score:
                 highest_score, best_match_key = score, key
-        return best_match_key if highest_score >= score_cutoff else None
+        canonical_key = best_match_key if highest_score >= score_cutoff else None
+        LABEL_MATCH_MEMO.put(memo_key, canonical_key)
+        return canonical_key
 
     def _parse_header(self, header_text):
         years = re.findall(r'\b(\d{4})\b', header_text)
@@ -94,15 +274,18 @@ class FinancialStatementParser:
                 return text[:match.start()], text[match.start():]
         return "", text
 
+    def _parse_statement_line(self, line, aliases, column_keys, target):
+        canonical_key = self._find_canonical_metric(line, aliases)
+        if canonical_key:
+            values = self._extract_values_from_line(line, len(column_keys))
+            if values:
+                for i, col_key in enumerate(column_keys):
+                    if canonical_key not in target[col_key]:
+                        target[col_key][canonical_key] = values[i]
+
     def _parse_generic_statement_body(self, body_text, aliases, column_keys):
         for line in body_text.split('\n'):
-            canonical_key = self._find_canonical_metric(line, aliases)
-            if canonical_key:
-                values = self._extract_values_from_line(line, len(column_keys))
-                if values:
-                    for i, col_key in enumerate(column_keys):
-                        if canonical_key not in self.parsed_data[col_key]:
-                            self.parsed_data[col_key][canonical_key] = values[i]
+            self._parse_statement_line(line, aliases, column_keys, self.parsed_data)
 
     def _validate(self):
         print("\n--- Running Data Validation ---")
@@ -116,16 +299,23 @@ class FinancialStatementParser:
                     print(f"✅ SUCCESS for {year}: Balance sheet equation balances.")
         print("--- Validation Finished ---\n")
 
-    def parse(self):
-        op_stmt_text_match = re.search(r'STATEMENTS\s+OF\s+OPERATIONS.*?(?=BALANCE\s+SHEETS)', self.text, re.DOTALL | re.IGNORECASE)
-        balance_sheet_text_match = re.search(r'BALANCE\s+SHEETS.*?(?=STATEMENTS\s+OF\s+CASH\s+FLOWS)', self.text, re.DOTALL | re.IGNORECASE)
-        cash_flow_text_match = re.search(r'STATEMENTS\s+OF\s+CASH\s+FLOWS.*', self.text, re.DOTALL | re.IGNORECASE)
+    def _build_results(self, as_records=False):
+        final_results = []
+        for key, data in sorted(self.parsed_data.items()):
+            year, period_type = key.split('_')
+            record = PeriodRecord(int(year), period_type)
+            for metric, value in data.items():
+                record[metric] = value * self.multiplier
+            final_results.append(record if as_records else record.to_dict())
+        return final_results
 
-        statements_to_parse = {
-            "Income Statement": (op_stmt_text_match, INCOME_STATEMENT_ALIASES, ['Net sales:']),
-            "Balance Sheet": (balance_sheet_text_match, BALANCE_SHEET_ALIASES, ['Current assets:']),
-            "Cash Flow": (cash_flow_text_match, CASH_FLOW_ALIASES, ['Operating activities:']),
-        }
+    def parse(self, as_records=False):
+        """Parses the statements; returns period dicts, or PeriodRecords if `as_records`."""
+        statements_to_parse = {}
+        for name, start_pattern, end_pattern, aliases, keywords in STATEMENT_SECTIONS:
+            pattern = f"{start_pattern}.*?(?={end_pattern})" if end_pattern else f"{start_pattern}.*"
+            match_obj = re.search(pattern, self.text, re.DOTALL | re.IGNORECASE)
+            statements_to_parse[name] = (match_obj, aliases, keywords)
 
         for name, (match_obj, aliases, keywords) in statements_to_parse.items():
             if not match_obj:
@@ -139,15 +329,224 @@ class FinancialStatementParser:
                 continue
             self._parse_generic_statement_body(body_text, aliases, column_keys)
 
-        final_results = []
-        for key, data in sorted(self.parsed_data.items()):
-            year, period_type = key.split('_')
-            scaled_data = {k: v * self.multiplier for k, v in data.items()}
-            period_data = {'year': int(year), 'period_type': period_type, **scaled_data}
-            final_results.append(period_data)
+        final_results = self._build_results(as_records)
+        self._validate()
+        return final_results
+
+
+def _heading_prefix_re(pattern):
+    """
+    For a heading pattern of words joined by \\s+, a regex matching the whole
+    heading or any leading part of it (e.g. "STATEMENTS OF" of "STATEMENTS OF
+    CASH FLOWS"), as far as it goes.
+    """
+    words = pattern.split(r'\s+')
+    prefix = words[-1]
+    for word in reversed(words[:-1]):
+        prefix = f"{word}(?:\\s+{prefix})?"
+    return re.compile(prefix, re.IGNORECASE)
+
+
+# (full heading, heading-or-prefix) regexes of every statement's start and end
+_HEADINGS = [
+    (re.compile(pattern, re.IGNORECASE), _heading_prefix_re(pattern))
+    for pattern in dict.fromkeys(p for _, start, end, _, _ in STATEMENT_SECTIONS for p in (start, end) if p)
+]
+
+
+def _settled_line_count(lines):
+    """
+    How many leading lines can be handed to the statement sections: the cut
+    must not fall inside a heading, including one that wraps over lines
+    ("STATEMENTS OF\\nOPERATIONS") or may still be completed by lines to come.
+    """
+    text = '\n'.join(lines)
+    # Offset of the newline ending each line; cutting after line i drops newlines[i]
+    newlines, offset = [], -1
+    for line in lines:
+        offset += len(line) + 1
+        newlines.append(offset)
+    blocked = set()
+    for full_re, prefix_re in _HEADINGS:
+        for match in prefix_re.finditer(text):
+            if full_re.fullmatch(match.group(0)):
+                span_end = match.end()
+            elif not text[match.end():].strip():
+                span_end = len(text) + 1  # Open at the end of the stream so far
+            else:
+                continue
+            blocked.update(i for i, newline in enumerate(newlines) if match.start() <= newline < span_end)
+    return max((i + 1 for i in range(len(lines)) if i not in blocked), default=0)
+
+
+class _StatementSection:
+    """State of one statement section inside a streamed document."""
+    WAITING, HEADER, BODY, CLOSED = "waiting", "header", "body", "closed"
+
+    def __init__(self, name, start_pattern, end_pattern, aliases, keywords):
+        self.name = name
+        self.start_re = re.compile(start_pattern, re.IGNORECASE)
+        self.end_re = re.compile(end_pattern, re.IGNORECASE) if end_pattern else None
+        self.aliases = aliases
+        self.keyword_res = [re.compile(k, re.IGNORECASE) for k in keywords]
+        self.state = self.WAITING
+        self.header_lines = []
+        self.column_keys = []
+        self.values = defaultdict(dict)
+
+    def feed_block(self, block, parser):
+        """
+        Consumes a block of whole lines that no heading straddles; returns True
+        when the section ends in this block. Headings may wrap inside it.
+        """
+        if self.state == self.CLOSED:
+            return False
+        search_from = 0
+        if self.state == self.WAITING:
+            start_match = self.start_re.search(block)
+            if not start_match:
+                return False
+            block = block[start_match.start():]
+            search_from = start_match.end() - start_match.start()
+            self.state = self.HEADER
 
+        ends_here = False
+        if self.end_re is not None:
+            end_match = self.end_re.search(block, search_from)
+            if end_match:
+                block, ends_here = block[:end_match.start()], True
+
+        if self.state == self.HEADER:
+            keyword_match = next((m for m in (k.search(block) for k in self.keyword_res) if m), None)
+            if keyword_match:
+                self.header_lines.append(block[:keyword_match.start()])
+                self.column_keys = parser._parse_header('\n'.join(self.header_lines))
+                self.header_lines = []
+                self.state = self.BODY
+                block = block[keyword_match.start():]
+            else:
+                self.header_lines.append(block)
+
+        if self.state == self.BODY and self.column_keys:
+            for line in block.split('\n'):
+                parser._parse_statement_line(line, self.aliases, self.column_keys, self.values)
+
+        if ends_here:
+            self.state = self.CLOSED
+        return ends_here
+
+    def is_complete(self):
+        """True once every canonical metric has a value for every detected column."""
+        if self.state not in (self.BODY, self.CLOSED) or not self.column_keys:
+            return False
+        metrics = set(self.aliases)
+        return all(metrics <= self.values.get(col_key, {}).keys() for col_key in self.column_keys)
+
+
+class StreamingFinancialStatementParser(FinancialStatementParser):
+    """
+    Incremental variant of FinancialStatementParser that consumes the document
+    as it is extracted (lines or page chunks) instead of a full text string.
+
+    Each statement is tracked by a small state machine (waiting for its title,
+    collecting its column header, parsing its body). Lines reach the sections
+    in blocks cut between headings, so a title wrapped over several lines is
+    found just as parse() finds it; a line where a title may still continue
+    is held back until the next chunk. A statement's values are committed
+    once its end is seen, in the same order and with the same first-value-wins
+    rules as parse(), so close() returns identical results.
+    """
+    def __init__(self):
+        self.text = None
+        self.parsed_data = defaultdict(dict)
+        self.sections = [_StatementSection(*section) for section in STATEMENT_SECTIONS]
+        self._pending_lines = []
+        self._next_commit = 0
+        self._seen_millions = False
+        self._seen_thousands = False
+
+    @property
+    def multiplier(self):
+        if self._seen_millions: return 1_000_000
+        if self._seen_thousands: return 1_000
+        return 1
+
+    def _commit_section(self, section, found):
+        if not found or section.state == _StatementSection.WAITING:
+            print(f"⚠️ WARNING: Could not find {section.name} in the text.")
+            return set()
+        if not section.column_keys:
+            print(f"⚠️ WARNING: Could not determine columns for {section.name}. Skipping.")
+            return set()
+        for col_key, data in section.values.items():
+            for metric, value in data.items():
+                if metric not in self.parsed_data[col_key]:
+                    self.parsed_data[col_key][metric] = value
+        return set(section.values)
+
+    def _commit_ready_sections(self, at_end=False, truncated=False):
+        """Commits finished sections in statement order; returns touched period keys."""
+        touched = set()
+        while self._next_commit < len(self.sections):
+            section = self.sections[self._next_commit]
+            if section.state != _StatementSection.CLOSED and not at_end:
+                break
+            # A section without an end pattern runs to the end of the document,
+            # and a truncated stream may have cut any open section short
+            found = section.state == _StatementSection.CLOSED or section.end_re is None or truncated
+            touched |= self._commit_section(section, found)
+            self._next_commit += 1
+        return touched
+
+    def _feed_lines(self, lines, at_end=False):
+        for line in lines:
+            lowered = line.lower()
+            self._seen_millions = self._seen_millions or 'in millions' in lowered
+            self._seen_thousands = self._seen_thousands or 'in thousands' in lowered
+        self._pending_lines += lines
+        settled = len(self._pending_lines) if at_end else _settled_line_count(self._pending_lines)
+        if settled:
+            block = '\n'.join(self._pending_lines[:settled])
+            self._pending_lines = self._pending_lines[settled:]
+            for section in self.sections:
+                section.feed_block(block, self)
+
+    def is_complete(self):
+        """
+        True once nothing later in the document can change the result: every
+        statement has all of its canonical metrics for every column, and every
+        statement with an end marker has been closed.
+        """
+        return all(
+            section.is_complete()
+            and (section.end_re is None or section.state == _StatementSection.CLOSED)
+            for section in self.sections
+        )
+
+    def feed(self, chunk):
+        """
+        Feeds a chunk of text (consecutive chunks are treated as newline-joined).
+        Returns the period records updated by statements completed in this chunk.
+        """
+        self._feed_lines(chunk.split('\n'))
+        touched = self._commit_ready_sections()
+        return [record for record in self._build_results()
+                if f"{record['year']}_{record['period_type']}" in touched]
+
+    def close(self, truncated=False, as_records=False):
+        """
+        Finishes the stream and returns the parsed periods, like parse().
+        If the stream was cut short (`truncated`), statements that were still
+        open are committed with the lines parsed so far.
+        """
+        self._feed_lines([], at_end=True)
+        self._commit_ready_sections(at_end=True, truncated=truncated)
+        final_results = self._build_results(as_records)
         self._validate()
         return final_results
+
+    def parse(self, as_records=False):
+        return self.close(as_records=as_records)
 # --- At the end of your parser.py script ---
 
 if __name__ == '__main__':
@@ -1,11 +1,20 @@
 # backend/financial_processor.py
 
-from typing import List, Dict, Any
+import sys
+import sqlite3
+from contextlib import closing
+from typing import List, Dict, Any, Optional, Tuple
 
 # --- Import your custom modules ---
-from text_extractor import TextExtractor
-from financial_parser import FinancialStatementParser
+import text_extractor
+import financial_parser
+import financial_analyzer
+from text_extractor import TextExtractor, ExtractionError, STAGE_CONTENT, STAGE_OCR, STAGE_TABLES
+from financial_parser import FinancialStatementParser, StreamingFinancialStatementParser, PeriodRecord, detect_multiplier
 from financial_analyzer import analyze_profitability, analyze_yoy_growth
+from artifact_store import ArtifactStore, stage_version
+from deadline import Deadline
+from text_index import TextIndex, select_pages
 
 # ==============================================================================
 # CONFIGURATION & CONSTANTS
@@ -35,6 +44,27 @@ METRIC_THRESHOLDS = {
 
 CATEGORY_PROFITABILITY = "Profitability"
 
+# Why streamed processing stopped before the end of the document
+STOP_ALL_METRICS_FOUND = "all_metrics_found"
+STOP_PAGE_BUDGET = "page_budget"
+STOP_DEADLINE = "deadline"
+
+# Seconds past the deadline during which remaining pages are still read
+# (text layer only, no OCR or tables) before processing stops outright
+DEADLINE_GRACE_SECONDS = 2.0
+# Skipped-pages key for pages that were never read at all
+SKIPPED_UNREAD = "unread"
+
+# Stages that can be re-run over stored artifacts
+STAGE_PARSE = "parse"
+STAGE_ANALYZE = "analyze"
+REPROCESS_STAGES = (STAGE_PARSE, STAGE_ANALYZE)
+
+# Code versions of each stage; artifacts are tagged with these
+EXTRACTION_VERSION = stage_version(text_extractor)
+PARSING_VERSION = stage_version(financial_parser)
+ANALYSIS_VERSION = stage_version(financial_analyzer, sys.modules[__name__])
+
 # ==============================================================================
 # RESPONSE STRUCTURE DEFINITION
 # ==============================================================================
@@ -45,6 +75,7 @@ def _get_response_template() -> Dict[str, Any]:
     This ensures a consistent format is always sent to the frontend.
     """
     return {
+        "document_id": None,
         "filename": "",
         "error": None,
         "ai_analysis": {
@@ -54,7 +85,9 @@ def _get_response_template() -> Dict[str, Any]:
         },
         "profitability_ratios": [],
         "raw_parsed_data": [],
-        "year_over_year_growth": []
+        "year_over_year_growth": [],
+        "partial": False,
+        "processing": {}
     }
 
 # ==============================================================================
@@ -159,65 +192,282 @@ def _generate_ai_summary(ratios: List[Dict], growth_metrics: List[Dict]) -> Dict
     return {"strengths": strengths, "weaknesses": weaknesses, "recommendations": recommendations}
 
 # ==============================================================================
-# PUBLIC PROCESSING FUNCTION (THE ORCHESTRATOR)
+# PIPELINE STAGES
 # ==============================================================================
 
-def process_financial_document(filepath: str, filename: str) -> Dict[str, Any]:
+def _run_analysis(parsed_data: List[PeriodRecord], response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs the analysis stage (ratios, growth, AI summary) over parsed records
+    and fills the corresponding sections of the response.
+    """
+    response["raw_parsed_data"] = [record.to_dict() for record in parsed_data]
+
+    # Step 4: Perform financial analysis on the structured data
+    print("INFO: Running financial analysis...")
+    profitability_insights = analyze_profitability(parsed_data)
+    growth_insights = analyze_yoy_growth(parsed_data)
+    response["year_over_year_growth"] = growth_insights
+
+    # Step 5: Transform raw analysis into the frontend-specific format
+    print("INFO: Transforming data for frontend...")
+    transformed_ratios = [
+        {
+            "category": CATEGORY_PROFITABILITY,
+            "metric": ratio["metric"],
+            "value": ratio["value"],
+            "year": ratio.get("year"),
+            "insight": _get_qualitative_insight(ratio["metric"], ratio["value"])
+        } for ratio in profitability_insights
+    ]
+    response["profitability_ratios"] = transformed_ratios
+
+    # Step 6: Generate the final AI-powered summary
+    ai_summary = _generate_ai_summary(transformed_ratios, growth_insights)
+    response["ai_analysis"] = ai_summary
+
+    print("SUCCESS: Analysis and transformation complete.")
+    return response
+
+
+def _extract_and_parse(
+    filepath: str,
+    early_stop: bool = False,
+    max_pages: Optional[int] = None,
+    deadline: Optional[Deadline] = None,
+    ocr_pool=None
+) -> Tuple[str, List[PeriodRecord], Dict[str, Any]]:
+    """
+    Streams extraction page by page into the incremental parser, so parsing
+    overlaps extraction. With `early_stop`, extraction stops as soon as every
+    canonical metric has been found for every column; `max_pages` caps the
+    number of pages read. Once the deadline expires, OCR and tables are skipped
+    and only the text layer is read, until the grace period is also spent.
+    Returns the extracted text (for the artifact store), the parsed records and
+    a summary of where processing stopped and what was skipped.
+    Raises ExtractionError on extraction failure.
+    """
+    deadline = deadline or Deadline()
+    extractor = TextExtractor(ocr_pool=ocr_pool)
+    parser = StreamingFinancialStatementParser()
+    pages = []
+    skipped_pages = {STAGE_OCR: [], STAGE_TABLES: [], STAGE_CONTENT: [], SKIPPED_UNREAD: []}
+    processing = {"pages_processed": 0, "page_count": 0, "stopped_early": False, "stop_reason": None}
+
+    with closing(extractor.iter_text(filepath, deadline)) as chunks:
+        for chunk in chunks:
+            pages.append(chunk.text)
+            parser.feed(chunk.text)
+            for stage in chunk.skipped:
+                skipped_pages[stage].append(chunk.page_number)
+            processing["pages_processed"] = chunk.page_number
+            processing["page_count"] = chunk.page_count
+            if chunk.page_number >= chunk.page_count:
+                continue
+            if early_stop and parser.is_complete():
+                processing["stop_reason"] = STOP_ALL_METRICS_FOUND
+            elif max_pages is not None and chunk.page_number >= max_pages:
+                processing["stop_reason"] = STOP_PAGE_BUDGET
+            elif deadline.overrun_by(DEADLINE_GRACE_SECONDS):
+                processing["stop_reason"] = STOP_DEADLINE
+            if processing["stop_reason"]:
+                processing["stopped_early"] = True
+                if processing["stop_reason"] != STOP_ALL_METRICS_FOUND:
+                    skipped_pages[SKIPPED_UNREAD] = list(range(chunk.page_number + 1, chunk.page_count + 1))
+                print(f"INFO: Stopped after page {chunk.page_number}/{chunk.page_count} ({processing['stop_reason']}).")
+                break
+
+    processing["skipped_pages"] = {stage: p for stage, p in skipped_pages.items() if p}
+    processing["skipped_stages"] = sorted(processing["skipped_pages"])
+    processing["partial"] = bool(processing["skipped_stages"])
+    return "\n".join(pages), parser.close(truncated=processing["stopped_early"], as_records=True), processing
+
+
+def _can_reuse_text(processing: Dict[str, Any], early_stop: bool) -> bool:
+    """
+    Stored text can be reused if it covers the whole document, or if it was cut
+    short only after every metric had been found and early stopping is allowed.
+    Partial extractions (deadline or page budget) are never reused.
+    """
+    if processing.get("partial"):
+        return False
+    stop_reason = processing.get("stop_reason")
+    return stop_reason is None or (early_stop and stop_reason == STOP_ALL_METRICS_FOUND)
+
+
+def _load_records(store: ArtifactStore, document_id: str, version: Optional[str] = None) -> Optional[List[PeriodRecord]]:
+    """Loads stored parsed records (JSON dicts) back into PeriodRecords."""
+    stored = store.load_parsed(document_id, version)
+    return None if stored is None else [PeriodRecord.from_dict(d) for d in stored]
+
+
+def _save_artifact(save_func, *args) -> None:
+    """Stores an artifact; a storage failure must never fail the request."""
+    try:
+        save_func(*args)
+    except (OSError, sqlite3.Error) as e:
+        print(f"WARNING: Could not store pipeline artifact: {str(e)}")
+
+
+def _index_text(index: Optional[TextIndex], document_id: Optional[str], filename: str, text: str) -> None:
+    """Adds a document's extracted text to the search index, unless already indexed."""
+    if index is not None and document_id is not None and not index.has_document(document_id, text):
+        _save_artifact(index.index_text, document_id, filename, text)
+
+
+def _parse_text(text: str, document_id: Optional[str] = None, index: Optional[TextIndex] = None) -> List[PeriodRecord]:
+    """
+    Parses stored extracted text. When the document is indexed, the pages
+    before its first statement heading (front matter) are not rescanned; the
+    scale of the amounts is still read from the whole document.
+    """
+    pages = index.statement_pages(document_id, text) if index is not None and document_id else None
+    if pages:
+        print(f"INFO: Parsing pages {pages[0]}-{pages[-1]}, from the first statement heading located by the search index.")
+        return FinancialStatementParser(select_pages(text, pages), detect_multiplier(text)).parse(as_records=True)
+    return FinancialStatementParser(text).parse(as_records=True)
+
+# ==============================================================================
+# PUBLIC PROCESSING FUNCTIONS (THE ORCHESTRATOR)
+# ==============================================================================
+
+def process_financial_document(
+    filepath: str,
+    filename: str,
+    document_id: Optional[str] = None,
+    store: Optional[ArtifactStore] = None,
+    early_stop: bool = False,
+    max_pages: Optional[int] = None,
+    deadline: Optional[Deadline] = None,
+    ocr_pool=None,
+    index: Optional[TextIndex] = None
+) -> Dict[str, Any]:
     """
     Orchestrates the full analysis pipeline from file to final JSON.
     This function acts as the core business logic controller.
+
+    When a document id and an artifact store are given, the extracted text and
+    parsed records are stored (and reused if the producing stage is unchanged).
+    With `early_stop` and/or `max_pages`, extraction stops once all statements
+    are parsed or the page budget is spent; see `response["processing"]`.
+    With a `deadline`, OCR and table extraction are skipped once it expires and
+    the response is marked `partial`, listing the skipped pages and stages.
+    An optional OCRWorkerPool runs scanned-page OCR on worker processes, and
+    an optional TextIndex makes the extracted text searchable.
     """
     # Step 1: Initialize the response using the template for consistency
     response = _get_response_template()
     response["filename"] = filename
+    use_store = store is not None and document_id is not None
 
     try:
-        # Step 2: Extract text from the document
-        print("INFO: Starting text extraction...")
-        extractor = TextExtractor()
-        extracted_text = extractor.extract_text(filepath)
-        if extracted_text.startswith("[Error:"):
-            response["error"] = f"Failed to extract text: {extracted_text}"
-            return response
-
-        # Step 3: Parse the extracted text into structured financial data
-        print("INFO: Starting financial parsing...")
-        parser = FinancialStatementParser(extracted_text)
-        parsed_data = parser.parse()
+        # Steps 2-3: Extract text from the document and parse it into structured data
+        extracted_text, parsed_data = None, None
+        if use_store:
+            metadata = store.load_metadata(document_id)
+            response["processing"] = metadata.get("processing", {})
+            if _can_reuse_text(response["processing"], early_stop):
+                extracted_text = store.load_text(document_id, EXTRACTION_VERSION)
+                parsed_data = _load_records(store, document_id, PARSING_VERSION)
+        if extracted_text is None:
+            print("INFO: Starting streamed text extraction and financial parsing...")
+            try:
+                extracted_text, parsed_data, processing = _extract_and_parse(
+                    filepath, early_stop, max_pages, deadline, ocr_pool
+                )
+            except ExtractionError as e:
+                response["error"] = f"Failed to extract text: [Error: {e}]"
+                return response
+            response["processing"] = processing
+            response["partial"] = processing["partial"]
+            if use_store:
+                _save_artifact(store.save_metadata, document_id, {"filename": filename, "processing": processing})
+                _save_artifact(store.save_text, document_id, EXTRACTION_VERSION, extracted_text)
+                if parsed_data:
+                    _save_artifact(store.save_parsed, document_id, PARSING_VERSION, [r.to_dict() for r in parsed_data])
+            _index_text(index, document_id, filename, extracted_text)
+        elif parsed_data is None:
+            print("INFO: Reusing stored extracted text. Starting financial parsing...")
+            _index_text(index, document_id, filename, extracted_text)
+            parsed_data = _parse_text(extracted_text, document_id, index)
+            if use_store and parsed_data:
+                _save_artifact(store.save_parsed, document_id, PARSING_VERSION, [r.to_dict() for r in parsed_data])
+        else:
+            print("INFO: Reusing stored extracted text and parsed records.")
         if not parsed_data:
             response["error"] = "Could not parse financial statements from the document."
             return response
-        
-        response["raw_parsed_data"] = parsed_data
+
         print("SUCCESS: Extraction and parsing complete.")
 
-        # Step 4: Perform financial analysis on the structured data
-        print("INFO: Running financial analysis...")
-        profitability_insights = analyze_profitability(parsed_data)
-        growth_insights = analyze_yoy_growth(parsed_data)
-        response["year_over_year_growth"] = growth_insights
-        
-        # Step 5: Transform raw analysis into the frontend-specific format
-        print("INFO: Transforming data for frontend...")
-        transformed_ratios = [
-            {
-                "category": CATEGORY_PROFITABILITY,
-                "metric": ratio["metric"],
-                "value": ratio["value"],
-                "year": ratio.get("year"),
-                "insight": _get_qualitative_insight(ratio["metric"], ratio["value"])
-            } for ratio in profitability_insights
-        ]
-        response["profitability_ratios"] = transformed_ratios
-
-        # Step 6: Generate the final AI-powered summary
-        ai_summary = _generate_ai_summary(transformed_ratios, growth_insights)
-        response["ai_analysis"] = ai_summary
-        
-        print("SUCCESS: Analysis and transformation complete.")
+        # Steps 4-6: Analysis, transformation and AI summary
+        _run_analysis(parsed_data, response)
 
     except Exception as e:
         print(f"CRITICAL: An unexpected error occurred during processing: {str(e)}")
         response["error"] = f"An internal server error occurred: {str(e)}"
 
-    return response
\ No newline at end of file
+    return response
+
+
+def reprocess_document(
+    document_id: str,
+    store: ArtifactStore,
+    stage: str = STAGE_PARSE,
+    index: Optional[TextIndex] = None
+) -> Dict[str, Any]:
+    """
+    Re-runs the pipeline from a given stage over stored artifacts, without
+    touching the original file. With `stage="parse"` the latest extracted text
+    is re-parsed (unless records from the current parser version exist),
+    skipping its front matter when the document is in the given index; with
+    `stage="analyze"` the latest parsed records are re-analysed. The stored
+    processing summary is carried over, so partial artifacts stay `partial`.
+    """
+    if stage not in REPROCESS_STAGES:
+        raise ValueError(f"Unknown stage '{stage}'. Expected one of: {', '.join(REPROCESS_STAGES)}")
+
+    response = _get_response_template()
+    response["document_id"] = document_id
+    metadata = store.load_metadata(document_id)
+    response["filename"] = metadata.get("filename", "")
+    # Stored artifacts cut short by a deadline or page budget stay partial
+    response["processing"] = metadata.get("processing", {})
+    response["partial"] = bool(response["processing"].get("partial"))
+
+    try:
+        if stage == STAGE_PARSE:
+            parsed_data = _load_records(store, document_id, PARSING_VERSION)
+            if parsed_data is None:
+                extracted_text = store.load_text(document_id)
+                if extracted_text is None:
+                    response["error"] = "No stored extracted text for this document."
+                    return response
+                parsed_data = _parse_text(extracted_text, document_id, index)
+                if parsed_data:
+                    _save_artifact(store.save_parsed, document_id, PARSING_VERSION, [r.to_dict() for r in parsed_data])
+        else:
+            parsed_data = _load_records(store, document_id)
+
+        if not parsed_data:
+            response["error"] = "Could not parse financial statements from the document."
+            return response
+
+        _run_analysis(parsed_data, response)
+
+    except Exception as e:
+        print(f"CRITICAL: An unexpected error occurred during reprocessing: {str(e)}")
+        response["error"] = f"An internal server error occurred: {str(e)}"
+
+    return response
+
+
+def reprocess_documents(
+    store: ArtifactStore,
+    stage: str = STAGE_PARSE,
+    document_ids: Optional[List[str]] = None,
+    index: Optional[TextIndex] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Re-runs downstream stages for many stored documents (all by default)."""
+    if document_ids is None:
+        document_ids = store.list_documents()
+    return {document_id: reprocess_document(document_id, store, stage, index) for document_id in document_ids}
@@ -0,0 +1,187 @@
+# backend/http_cache.py
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Response, request
+
+# Brotli is optional: when it is not installed we simply negotiate gzip.
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment image
+    brotli = None
+
+# ==============================================================================
+# CONFIGURATION & CONSTANTS
+# ==============================================================================
+
+HASH_CHUNK_SIZE = 1024 * 1024
+MIN_COMPRESS_SIZE = 1024      # Bytes; tiny bodies are not worth the CPU
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+RESULT_CACHE_SIZE = 128       # Number of documents kept in memory
+
+# Keys that are always returned, whatever the `fields` selection.
+ENVELOPE_FIELDS = ("document_id", "filename", "error")
+
+# ==============================================================================
+# DOCUMENT HASHING & FIELD SELECTION
+# ==============================================================================
+
+def compute_document_hash(filepath: str) -> str:
+    """Returns the SHA-256 hex digest of a file, read in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_fields_param(raw: Optional[str]) -> Optional[List[str]]:
+    """
+    Parses a comma-separated `fields` query parameter.
+    Returns None when no selection was requested (i.e. the full payload).
+    """
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    return sorted(set(fields)) or None
+
+
+def select_fields(result: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Returns only the requested top-level fields of an analysis result, plus the
+    envelope fields. Raises ValueError for fields the response does not have.
+    """
+    if not fields:
+        return result
+    unknown = [f for f in fields if f not in result]
+    if unknown:
+        raise ValueError(f"Unknown field(s) requested: {', '.join(unknown)}")
+    return {k: v for k, v in result.items() if k in ENVELOPE_FIELDS or k in fields}
+
+
+def make_etag(document_hash: str, fields: Optional[List[str]], version: Optional[str] = None) -> str:
+    """
+    Derives the ETag of a (document, field selection) representation. The
+    optional pipeline version invalidates client caches when analysis changes.
+    """
+    etag = document_hash if version is None else f"{document_hash}-{version}"
+    if not fields:
+        return etag
+    fields_digest = hashlib.sha1(",".join(fields).encode("utf-8")).hexdigest()[:12]
+    return f"{etag}-{fields_digest}"
+
+# ==============================================================================
+# RESULT CACHE
+# ==============================================================================
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of analysis results keyed by document hash.
+    Encoded response bodies are memoized per (fields, encoding) so repeated
+    fetches of the same representation skip serialization and compression.
+    """
+    def __init__(self, max_size: int = RESULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, document_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(document_hash)
+            if entry is None:
+                return None
+            self._entries.move_to_end(document_hash)
+            return entry["result"]
+
+    def put(self, document_hash: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[document_hash] = {"result": result, "bodies": {}}
+            self._entries.move_to_end(document_hash)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_body(self, document_hash: str, key: tuple) -> Optional[Tuple[bytes, Optional[str]]]:
+        with self._lock:
+            entry = self._entries.get(document_hash)
+            return entry["bodies"].get(key) if entry else None
+
+    def put_body(self, document_hash: str, key: tuple, body: Tuple[bytes, Optional[str]]) -> None:
+        with self._lock:
+            entry = self._entries.get(document_hash)
+            if entry is not None:
+                entry["bodies"][key] = body
+
+# ==============================================================================
+# RESPONSE BUILDING
+# ==============================================================================
+
+def _negotiate_encoding() -> Optional[str]:
+    """Picks the best content-coding the client accepts, or None for identity."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _encode_body(payload: Dict[str, Any], encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Serializes a payload to compact JSON and applies the content-coding.
+    Returns the body and the coding actually applied (None for identity).
+    """
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if encoding is None or len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    return gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+
+
+def build_json_response(
+    payload: Dict[str, Any],
+    status: int = 200,
+    etag: Optional[str] = None,
+    cache: Optional[ResultCache] = None,
+    cache_key: Optional[str] = None,
+) -> Response:
+    """
+    Builds a compact, content-negotiated JSON response.
+
+    When an ETag is given the response is tagged for revalidation, and GET
+    requests are validated against `If-None-Match` (answering 304 without
+    serializing anything).
+    When a cache and cache key are given, the encoded body is memoized.
+    """
+    is_conditional = etag is not None and status == 200 and request.method in ("GET", "HEAD")
+    if is_conditional and request.if_none_match.contains_weak(etag):
+        not_modified = Response(status=304)
+        not_modified.set_etag(etag, weak=True)
+        not_modified.headers["Cache-Control"] = "no-cache"
+        return not_modified
+
+    requested_encoding = _negotiate_encoding()
+    encoded = None
+    body_key = (etag, requested_encoding)
+    if cache is not None and cache_key is not None:
+        encoded = cache.get_body(cache_key, body_key)
+    if encoded is None:
+        encoded = _encode_body(payload, requested_encoding)
+        if cache is not None and cache_key is not None:
+            cache.put_body(cache_key, body_key, encoded)
+    body, encoding = encoded
+
+    response = Response(body, status=status, mimetype="application/json")
+    response.headers["Vary"] = "Accept-Encoding"
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "no-cache"
+    return response
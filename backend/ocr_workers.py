@@ -0,0 +1,219 @@
+# backend/ocr_workers.py
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from deadline import Deadline
+from text_extractor import TextExtractor, OCRTimeoutError, OCR_RESOLUTION
+
+# ==============================================================================
+# CONFIGURATION & CONSTANTS
+# ==============================================================================
+
+# One grayscale US Letter page (8.5 x 11 in) at the OCR resolution
+RASTER_SLOT_BYTES = int(8.5 * OCR_RESOLUTION) * 11 * OCR_RESOLUTION
+# Raster slots per worker: one being recognised, one rendered ahead
+SLOTS_PER_WORKER = 2
+# Where POSIX shared memory lives; Docker gives it only 64 MB by default
+SHM_PATH = "/dev/shm"
+# Share of the free shared memory the raster slots may take, leaving room
+# for one-off blocks of oversized pages and for other processes
+SHM_BUDGET_RATIO = 0.5
+
+# ==============================================================================
+# SHARED RASTER BUFFERS
+# ==============================================================================
+
+def max_raster_slots(slot_bytes: int = RASTER_SLOT_BYTES) -> Optional[int]:
+    """
+    How many raster slots fit in the shared-memory budget, or None when the
+    free space cannot be measured. Slots are sparse until written, so
+    overcommitting /dev/shm would only fail later, with SIGBUS on a page write.
+    """
+    try:
+        stats = os.statvfs(SHM_PATH)
+    except (AttributeError, OSError):
+        return None
+    return int(stats.f_bavail * stats.f_frsize * SHM_BUDGET_RATIO) // slot_bytes
+
+class RasterHandle(NamedTuple):
+    """What crosses the process boundary instead of the pixels themselves."""
+    name: str
+    height: int
+    width: int
+    pooled: bool  # False for a one-off block sized for an unusually large page
+
+
+class RasterPool:
+    """
+    A fixed set of reusable shared-memory blocks that hold 8-bit grayscale
+    page rasters. Writing a page blocks while every slot is in use, which bounds
+    both memory and how far rendering can run ahead of OCR. Pages larger
+    than a slot get a dedicated block that is unlinked on release.
+    """
+    def __init__(self, slots: int, slot_bytes: int = RASTER_SLOT_BYTES):
+        self.slot_bytes = slot_bytes
+        self._blocks = [SharedMemory(create=True, size=slot_bytes) for _ in range(slots)]
+        self._free = list(self._blocks)
+        self._reserved: Dict[str, SharedMemory] = {}  # one-off block name -> slot it holds
+        self._available = threading.Condition()
+        self._closed = False
+
+    @property
+    def slots(self) -> int:
+        return len(self._blocks)
+
+    def _acquire(self, nbytes: int) -> Tuple[SharedMemory, bool]:
+        with self._available:
+            while not self._free and not self._closed:
+                self._available.wait()
+            if self._closed:
+                raise RuntimeError("Raster pool is closed")
+            block = self._free.pop()
+        if nbytes <= self.slot_bytes:
+            return block, True
+        # The slot stays reserved while the oversized page is in flight
+        oversized = SharedMemory(create=True, size=nbytes)
+        with self._available:
+            self._reserved[oversized.name] = block
+        return oversized, False
+
+    def _release(self, block: SharedMemory) -> None:
+        with self._available:
+            self._free.append(block)
+            self._available.notify()
+
+    def write(self, image: Image.Image) -> Tuple[SharedMemory, RasterHandle]:
+        """Copies a page into a free block as grayscale; returns the block and its handle."""
+        gray = image if image.mode == "L" else image.convert("L")
+        width, height = gray.size
+        block, pooled = self._acquire(width * height)
+        np.ndarray((height, width), dtype=np.uint8, buffer=block.buf)[:] = np.asarray(gray)
+        return block, RasterHandle(block.name, height, width, pooled)
+
+    def release(self, block: SharedMemory, handle: RasterHandle) -> None:
+        """Returns a block once its consumer is done with it."""
+        if handle.pooled:
+            self._release(block)
+        else:
+            with self._available:
+                slot = self._reserved.pop(handle.name)
+            block.close()
+            block.unlink()
+            self._release(slot)
+
+    def close(self) -> None:
+        with self._available:
+            self._closed = True
+            self._available.notify_all()
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+# ==============================================================================
+# WORKER SIDE
+# ==============================================================================
+
+# Pooled blocks attached by this worker process, kept mapped for reuse
+_attached: Dict[str, SharedMemory] = {}
+
+
+def _raster_view(handle: RasterHandle) -> Tuple[np.ndarray, Optional[SharedMemory]]:
+    """A NumPy view over a shared raster (no copy); returns a one-off block to close after use."""
+    if handle.pooled:
+        block = _attached.get(handle.name)
+        if block is None:
+            block = _attached[handle.name] = SharedMemory(name=handle.name)
+        one_off = None
+    else:
+        block = one_off = SharedMemory(name=handle.name)
+    view = np.ndarray((handle.height, handle.width), dtype=np.uint8, buffer=block.buf)
+    return view, one_off
+
+
+class OCRWorkerError(Exception):
+    """An OCR failure in a worker, re-raised in a form that always unpickles."""
+    pass
+
+
+def _ocr_raster(handle: RasterHandle, expires_at: Optional[float]) -> str:
+    """Worker entry point: OCR a shared page raster."""
+    deadline = Deadline(None if expires_at is None else expires_at - time.time())
+    view, one_off = _raster_view(handle)
+    try:
+        return TextExtractor._ocr_image(view, deadline)
+    except OCRTimeoutError:
+        # Passed through as is: the extractor records it as a skipped stage
+        raise
+    except Exception as e:
+        # Everything else, tesseract errors included, is a failure. Some
+        # exceptions (e.g. pytesseract.TesseractNotFoundError) cannot be
+        # unpickled in the parent, which would break the whole process pool
+        raise OCRWorkerError(f"{type(e).__name__}: {e}") from None
+    finally:
+        del view
+        if one_off is not None:
+            one_off.close()
+
+# ==============================================================================
+# OCR WORKER POOL
+# ==============================================================================
+
+class OCRWorkerPool:
+    """
+    Runs page OCR on worker processes. Rendered pages are handed over through
+    shared-memory raster slots, so only a small handle is pickled per page.
+    A slot is returned to the pool as soon as its page has been recognised.
+    The number of slots is capped by the free shared memory.
+    """
+    def __init__(self, workers: Optional[int] = None, slots: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        slots = slots or SLOTS_PER_WORKER * self.workers
+        fitting = max_raster_slots()
+        if fitting is not None and fitting < slots:
+            print(f"WARNING: Only {fitting} OCR raster slots fit in {SHM_PATH} (wanted {slots}); "
+                  f"raise the container's shm_size to use every worker.")
+            slots = max(1, fitting)
+        self.rasters = RasterPool(slots)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    @property
+    def slots(self) -> int:
+        return self.rasters.slots
+
+    def submit(self, image: Image.Image, deadline: Optional[Deadline] = None) -> "Future[str]":
+        """Queues a rendered page for OCR; blocks while every raster slot is busy."""
+        remaining = (deadline or Deadline()).remaining()
+        # Monotonic clocks are per process; hand the deadline over as wall-clock time
+        expires_at = None if remaining is None else time.time() + remaining
+        block, handle = self.rasters.write(image)
+        try:
+            try:
+                future = self._executor.submit(_ocr_raster, handle, expires_at)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed by the OS); start a fresh set
+                print("WARNING: OCR worker pool was broken; restarting it.")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                future = self._executor.submit(_ocr_raster, handle, expires_at)
+        except BaseException:
+            self.rasters.release(block, handle)
+            raise
+        future.add_done_callback(lambda _: self.rasters.release(block, handle))
+        return future
+
+    def map(self, images: List[Image.Image], deadline: Optional[Deadline] = None) -> List[str]:
+        """OCRs several pages in parallel, returning their text in order."""
+        return [future.result() for future in [self.submit(image, deadline) for image in images]]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.rasters.close()
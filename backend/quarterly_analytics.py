@@ -0,0 +1,212 @@
+# backend/quarterly_analytics.py
+
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from financial_parser import METRIC_SCHEMA, INCOME_STATEMENT_ALIASES, CASH_FLOW_ALIASES
+
+# ==============================================================================
+# CONFIGURATION & CONSTANTS
+# ==============================================================================
+
+QUARTERS_PER_YEAR = 4
+DEFAULT_TTM_WINDOW = 4
+INITIAL_CAPACITY = 16
+
+# Flow metrics (income / cash flow) are summed into trailing-twelve-month
+# totals; balance sheet metrics are point-in-time and are not.
+FLOW_METRICS = tuple(m for m in METRIC_SCHEMA if m in INCOME_STATEMENT_ALIASES or m in CASH_FLOW_ALIASES)
+_FLOW_INDEX = np.array([METRIC_SCHEMA.index(m) for m in FLOW_METRICS])
+
+# A quarterly period: (fiscal year, fiscal quarter 1-4, {metric: value})
+QuarterPeriod = Tuple[int, int, Mapping[str, Any]]
+
+# ==============================================================================
+# PER-COMPANY SERIES
+# ==============================================================================
+
+def _lagged(array: np.ndarray, start: int, end: int, lag: int) -> np.ndarray:
+    """Rows [start - lag, end - lag) of `array`, NaN-padded before row 0."""
+    lo = start - lag
+    if lo >= 0:
+        return array[lo:end - lag]
+    pad = np.full((min(-lo, end - start),) + array.shape[1:], np.nan)
+    return np.concatenate([pad, array[0:max(0, end - lag)]])
+
+
+def _pct_change(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (current - previous) / np.abs(previous)
+    change[~np.isfinite(change)] = np.nan
+    return change
+
+
+class CompanyQuarterlySeries:
+    """
+    A company's quarterly history in contiguous NumPy arrays (one row per
+    fiscal quarter, one column per metric of METRIC_SCHEMA) with derived
+    TTM totals, QoQ / YoY changes and running averages.
+
+    New quarters only compute the derived rows they affect, so appending a
+    filing costs O(new periods). Revising an earlier quarter recomputes from
+    that quarter onward. Missing quarters are NaN rows, so a TTM total or a
+    change that needs them is reported as missing rather than guessed.
+    """
+    def __init__(self, ttm_window: int = DEFAULT_TTM_WINDOW):
+        self.ttm_window = ttm_window
+        self.first_index: Optional[int] = None  # year * 4 + quarter - 1 of row 0
+        self.length = 0
+        self._allocate(INITIAL_CAPACITY)
+
+    def _allocate(self, capacity: int) -> None:
+        metrics = len(METRIC_SCHEMA)
+        old = getattr(self, "_arrays", None)
+        self._arrays = {
+            "values": np.full((capacity, metrics), np.nan),
+            "ttm": np.full((capacity, len(FLOW_METRICS)), np.nan),
+            "qoq": np.full((capacity, metrics), np.nan),
+            "yoy": np.full((capacity, metrics), np.nan),
+            "cum_sum": np.zeros((capacity, metrics)),
+            "cum_count": np.zeros((capacity, metrics)),
+        }
+        if old is not None:
+            for name, array in old.items():
+                self._arrays[name][:self.length] = array[:self.length]
+
+    def _prepend_rows(self, count: int) -> None:
+        """Makes room for quarters older than the current first one."""
+        self._ensure_capacity(self.length + count)
+        for name, array in self._arrays.items():
+            array[count:self.length + count] = array[:self.length].copy()
+            array[:count] = 0.0 if name.startswith("cum_") else np.nan
+        self.first_index -= count
+        self.length += count
+
+    def _ensure_capacity(self, rows: int) -> None:
+        capacity = len(self._arrays["values"])
+        if rows > capacity:
+            while capacity < rows:
+                capacity *= 2
+            self._allocate(capacity)
+
+    def extend(self, periods: Iterable[QuarterPeriod]) -> int:
+        """
+        Adds (or revises) quarters and updates the derived metrics.
+        Returns the row from which derived metrics were recomputed.
+        """
+        rows = []
+        for year, quarter, metrics in periods:
+            if not 1 <= int(quarter) <= QUARTERS_PER_YEAR:
+                raise ValueError(f"Quarter must be between 1 and {QUARTERS_PER_YEAR}, got {quarter!r}")
+            unknown = [m for m in metrics if m not in METRIC_SCHEMA]
+            if unknown:
+                raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+            rows.append((int(year) * QUARTERS_PER_YEAR + int(quarter) - 1, metrics))
+        if not rows:
+            return self.length
+
+        if self.first_index is None:
+            self.first_index = min(index for index, _ in rows)
+        oldest = min(index for index, _ in rows)
+        if oldest < self.first_index:
+            self._prepend_rows(self.first_index - oldest)
+
+        previous_length = self.length
+        end = max(self.length, max(index for index, _ in rows) - self.first_index + 1)
+        self._ensure_capacity(end)
+        self.length = end
+
+        values = self._arrays["values"]
+        for index, metrics in rows:
+            row = values[index - self.first_index]
+            for metric, value in metrics.items():
+                row[METRIC_SCHEMA.index(metric)] = np.nan if value is None else float(value)
+
+        # Quarters skipped between the old last row and a new one are missing
+        # rows whose running totals must still be carried forward
+        start = min(oldest - self.first_index, previous_length)
+        self._recompute(start)
+        return start
+
+    def _recompute(self, start: int) -> None:
+        """Vectorized update of every derived row from `start` to the end."""
+        end = self.length
+        a = self._arrays
+        values = a["values"]
+        current = values[start:end]
+
+        # --- Trailing twelve months: sum of the last `ttm_window` quarters ---
+        window = self.ttm_window
+        block = _lagged(values, start, end + window - 1, window - 1)[:, _FLOW_INDEX]
+        a["ttm"][start:end] = sliding_window_view(block, window, axis=0).sum(axis=-1)
+
+        # --- Quarter-over-quarter and year-over-year (same quarter) changes ---
+        a["qoq"][start:end] = _pct_change(current, _lagged(values, start, end, 1))
+        a["yoy"][start:end] = _pct_change(current, _lagged(values, start, end, QUARTERS_PER_YEAR))
+
+        # --- Running averages via cumulative sums that ignore missing values ---
+        base_sum = a["cum_sum"][start - 1] if start > 0 else 0.0
+        base_count = a["cum_count"][start - 1] if start > 0 else 0.0
+        present = ~np.isnan(current)
+        a["cum_sum"][start:end] = base_sum + np.cumsum(np.where(present, current, 0.0), axis=0)
+        a["cum_count"][start:end] = base_count + np.cumsum(present, axis=0)
+
+    def period(self, row: int) -> Tuple[int, int]:
+        index = self.first_index + row
+        return index // QUARTERS_PER_YEAR, index % QUARTERS_PER_YEAR + 1
+
+    def to_records(self, last: Optional[int] = None) -> List[Dict[str, Any]]:
+        """JSON-ready rows (oldest first), omitting missing values."""
+        a = self._arrays
+        first_row = 0 if last is None else max(0, self.length - last)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            running_avg = a["cum_sum"][first_row:self.length] / a["cum_count"][first_row:self.length]
+
+        def present(names, row):
+            return {name: float(v) for name, v in zip(names, row) if not np.isnan(v)}
+
+        records = []
+        for offset, row in enumerate(range(first_row, self.length)):
+            year, quarter = self.period(row)
+            records.append({
+                "year": year,
+                "quarter": quarter,
+                "values": present(METRIC_SCHEMA, a["values"][row]),
+                "ttm": present(FLOW_METRICS, a["ttm"][row]),
+                "qoq": present(METRIC_SCHEMA, a["qoq"][row]),
+                "yoy": present(METRIC_SCHEMA, a["yoy"][row]),
+                "running_avg": present(METRIC_SCHEMA, running_avg[offset]),
+            })
+        return records
+
+# ==============================================================================
+# ENGINE
+# ==============================================================================
+
+class QuarterlyAnalyticsEngine:
+    """Thread-safe registry of per-company quarterly series."""
+    def __init__(self, ttm_window: int = DEFAULT_TTM_WINDOW):
+        self.ttm_window = ttm_window
+        self._companies: Dict[str, CompanyQuarterlySeries] = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, company_id: str, periods: Iterable[QuarterPeriod]) -> None:
+        periods = list(periods)
+        with self._lock:
+            series = self._companies.get(company_id)
+            if series is None:
+                series = CompanyQuarterlySeries(self.ttm_window)
+            series.extend(periods)
+            self._companies[company_id] = series
+
+    def has_company(self, company_id: str) -> bool:
+        with self._lock:
+            return company_id in self._companies
+
+    def analytics(self, company_id: str, last: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            series = self._companies.get(company_id)
+            return series.to_records(last) if series is not None else []
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Re-runs the parsing and/or analysis stages over stored pipeline artifacts,
+without re-uploading or re-extracting any document.
+
+Usage:
+    python reprocess.py [--stage parse|analyze] [--artifacts DIR] [--index FILE] [--output FILE] [DOCUMENT_ID ...]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from artifact_store import ArtifactStore, ARTIFACT_ROOT
+from financial_processor import reprocess_documents, REPROCESS_STAGES, STAGE_PARSE
+from text_index import TextIndex
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="Re-run downstream stages over stored artifacts.")
+    arg_parser.add_argument("document_ids", nargs="*", help="Documents to reprocess (default: all stored documents)")
+    arg_parser.add_argument("--stage", choices=REPROCESS_STAGES, default=STAGE_PARSE,
+                            help="First stage to re-run (default: parse)")
+    arg_parser.add_argument("--artifacts", default=ARTIFACT_ROOT, help="Artifact store directory")
+    arg_parser.add_argument("--index", help="Search index file; when given, pages before the first statement heading are not re-parsed")
+    arg_parser.add_argument("--output", help="Optional JSON file to write the refreshed results to")
+    args = arg_parser.parse_args()
+
+    store = ArtifactStore(args.artifacts)
+    start_time = time.perf_counter()
+    index = TextIndex(args.index) if args.index else None
+    results = reprocess_documents(store, args.stage, args.document_ids or None, index)
+    elapsed = time.perf_counter() - start_time
+
+    failed = {doc: r["error"] for doc, r in results.items() if r.get("error")}
+    for document_id, error in failed.items():
+        print(f"❌ {document_id}: {error}")
+    print(f"✅ Reprocessed {len(results) - len(failed)}/{len(results)} documents from the '{args.stage}' stage in {elapsed:.2f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Results saved to {args.output}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
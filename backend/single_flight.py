@@ -0,0 +1,79 @@
+# backend/single_flight.py
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# ==============================================================================
+# IN-FLIGHT DEDUPLICATION
+# ==============================================================================
+
+class _Call:
+    """One in-flight execution that any number of callers can wait on."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    function, every caller arriving while it runs waits for and shares its
+    result (or exception). Once the call finishes the key is released, so
+    later callers start a fresh execution.
+
+    A waiter may bound its wait with `timeout`; if the shared call has not
+    finished by then, the waiter runs `fn` itself instead of waiting longer.
+    """
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._coalesced = 0
+        self._wait_timeouts = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Runs `fn` once per in-flight key. Returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(None if timeout is None else max(timeout, 0.0)):
+                with self._lock:
+                    call.waiters -= 1
+                    self._wait_timeouts += 1
+                return fn(), False
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for the metrics endpoint."""
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "wait_timeouts": self._wait_timeouts,
+                "in_flight": len(self._calls),
+                "waiting": sum(call.waiters for call in self._calls.values()),
+            }
@@ -0,0 +1,54 @@
+# backend/tests/test_financial_parser.py
+
+import os
+import re
+
+import pytest
+
+from financial_parser import FinancialStatementParser, StreamingFinancialStatementParser
+
+SAMPLE_TEXT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "output", "financial_report_extracted.txt")
+
+# Statement titles broken over lines the way PDF extraction leaves them
+WRAPPED_HEADINGS = {
+    "STATEMENTS OF OPERATIONS": "STATEMENTS OF\nOPERATIONS",
+    "BALANCE SHEETS": "BALANCE\n  SHEETS",
+    "STATEMENTS OF CASH FLOWS": "STATEMENTS OF CASH\n\nFLOWS",
+}
+
+
+def _paginate(text, lines_per_page):
+    """The text re-split into pages of N lines, so statements continue across pages."""
+    lines = re.sub(r"\n--- Page \d+/\d+ ---\n", "\n", text).strip("\n").split("\n")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    return [f"--- Page {i}/{len(pages)} ---\n" + "\n".join(page) for i, page in enumerate(pages, 1)]
+
+
+def _stream(chunks):
+    parser = StreamingFinancialStatementParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close(as_records=True)
+
+
+@pytest.fixture
+def sample_text():
+    with open(SAMPLE_TEXT, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("wrapped", [False, True])
+@pytest.mark.parametrize("lines_per_page", [1, 3, 7, 20])
+def test_streaming_parser_matches_full_parse(sample_text, wrapped, lines_per_page):
+    pages = _paginate(sample_text, lines_per_page)
+    if wrapped:
+        for heading, wrapped_heading in WRAPPED_HEADINGS.items():
+            pages = [page.replace(heading, wrapped_heading) for page in pages]
+    text = "\n".join(pages)
+
+    expected = [r.to_dict() for r in FinancialStatementParser(text).parse(as_records=True)]
+    assert any(record.get("total_liabilities") is not None for record in expected)
+
+    assert [r.to_dict() for r in _stream(pages)] == expected
+    assert [r.to_dict() for r in _stream(text.split("\n"))] == expected
+    assert [r.to_dict() for r in _stream([text])] == expected
@@ -0,0 +1,55 @@
+# backend/tests/test_quarterly_analytics.py
+
+import random
+
+import pytest
+
+from quarterly_analytics import CompanyQuarterlySeries
+
+
+def _batch(periods):
+    series = CompanyQuarterlySeries()
+    series.extend(periods)
+    return series.to_records()
+
+
+def _incremental(batches):
+    series = CompanyQuarterlySeries()
+    for periods in batches:
+        series.extend(periods)
+    return series.to_records()
+
+
+def test_running_average_carries_over_a_gap():
+    year_2022 = [(2022, q, {"net_income": v}) for q, v in zip(range(1, 5), [10, 20, 30, 40])]
+    late = [(2023, 4, {"net_income": 100})]
+
+    records = _incremental([year_2022, late])
+
+    assert records[-1]["running_avg"]["net_income"] == pytest.approx(40.0)
+    assert [r["running_avg"]["net_income"] for r in records[4:7]] == pytest.approx([25.0] * 3)
+    assert records == _batch(year_2022 + late)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_matches_batch_with_gaps_and_revisions(seed):
+    rng = random.Random(seed)
+    quarters = [(year, quarter) for year in range(2015, 2024) for quarter in range(1, 5)]
+    reported = [period for period in quarters if rng.random() > 0.25]  # leave gaps
+    periods = [
+        (year, quarter, {"net_income": rng.uniform(-50, 150), "total_net_sales": rng.uniform(100, 500)})
+        for year, quarter in reported
+    ]
+    # Filings arrive one quarter at a time (so gaps open at the end of the
+    # series), then a few quarters are revised
+    revisions = [(year, quarter, {"net_income": rng.uniform(-50, 150)}) for year, quarter, _ in rng.sample(periods, 5)]
+    batches = [[period] for period in periods] + [revisions]
+
+    expected = _batch(periods + revisions)
+    actual = _incremental(batches)
+
+    assert [(r["year"], r["quarter"]) for r in actual] == [(r["year"], r["quarter"]) for r in expected]
+    for got, want in zip(actual, expected):
+        for key in ("values", "ttm", "qoq", "yoy", "running_avg"):
+            assert got[key].keys() == want[key].keys()
+            assert list(got[key].values()) == pytest.approx(list(want[key].values()))
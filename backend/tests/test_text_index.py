@@ -0,0 +1,95 @@
+# backend/tests/test_text_index.py
+
+import os
+import re
+
+import pytest
+
+from financial_parser import FinancialStatementParser, detect_multiplier
+from financial_processor import _parse_text
+from text_index import TextIndex, select_pages, split_pages
+
+SAMPLE_TEXT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "output", "financial_report_extracted.txt")
+DOCUMENT_ID = "d" * 64
+
+
+def _repaginate(text, lines_per_page, front_matter=None):
+    """The sample's statements re-split every N lines, between front matter and notes pages."""
+    lines = re.sub(r"\n--- Page \d+/\d+ ---\n", "\n", text).strip("\n").split("\n")
+    pages = [front_matter or ["Annual report", "Table of contents"], ["Risk factors"]]
+    pages += [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    pages += [["Notes to the financial statements", "Net income 1,000 2,000"], ["Total assets 5 6"]]
+    count = len(pages)
+    return "".join(f"\n--- Page {i}/{count} ---\n" + "\n".join(page) + "\n" for i, page in enumerate(pages, 1))
+
+
+@pytest.fixture
+def sample_text():
+    with open(SAMPLE_TEXT, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def index(tmp_path):
+    text_index = TextIndex(str(tmp_path / "index.sqlite3"))
+    yield text_index
+    text_index.close()
+
+
+def test_split_pages_round_trips(sample_text):
+    pages = split_pages("preamble" + sample_text)
+    assert select_pages("preamble" + sample_text, sorted(pages)) == "preamble" + sample_text
+
+
+@pytest.mark.parametrize("lines_per_page", [5, 8, 12, 20, 40])
+def test_multi_page_statements_parse_like_the_full_text(sample_text, index, lines_per_page):
+    text = _repaginate(sample_text, lines_per_page)
+    index.index_text(DOCUMENT_ID, "report.pdf", text)
+
+    pages = index.statement_pages(DOCUMENT_ID, text)
+    assert pages is not None and pages[0] == 3  # front matter skipped
+
+    expected = FinancialStatementParser(text).parse(as_records=True)
+    actual = _parse_text(text, DOCUMENT_ID, index)
+    assert [r.to_dict() for r in actual] == [r.to_dict() for r in expected]
+    reported = {k for r in actual for k, v in r.to_dict().items() if v is not None}
+    assert {"total_liabilities", "total_shareholders_equity"} <= reported
+
+
+def test_scale_stated_only_in_front_matter_still_applies(sample_text, index):
+    # Statements headed "in thousands" (shares), with the amounts' scale only in the front matter
+    text = _repaginate(sample_text.replace("In millions", "In thousands"), 12,
+                       front_matter=["Annual report", "All amounts in millions"])
+    index.index_text(DOCUMENT_ID, "report.pdf", text)
+    pages = index.statement_pages(DOCUMENT_ID, text)
+    assert pages is not None and pages[0] == 3
+    assert detect_multiplier(select_pages(text, pages)) == 1_000
+
+    expected = FinancialStatementParser(text).parse(as_records=True)
+    assert expected and FinancialStatementParser(text).multiplier == 1_000_000
+    actual = _parse_text(text, DOCUMENT_ID, index)
+    assert [r.to_dict() for r in actual] == [r.to_dict() for r in expected]
+
+
+def test_heading_the_index_cannot_see_falls_back_to_the_full_text(sample_text, index):
+    # "XSTATEMENTS" is one token, but the parser's pattern still matches it
+    text = _repaginate(sample_text, 12, front_matter=["CONDENSEDXSTATEMENTS OF OPERATIONS"])
+    index.index_text(DOCUMENT_ID, "report.pdf", text)
+    assert index.statement_pages(DOCUMENT_ID, text) is None
+
+
+def test_statement_pages_require_the_indexed_text(sample_text, index):
+    text = _repaginate(sample_text, 12)
+    index.index_text(DOCUMENT_ID, "report.pdf", text)
+    assert index.statement_pages(DOCUMENT_ID, text + "\nedited") is None
+
+
+def test_phrase_search_reports_pages(sample_text, index):
+    text = _repaginate(sample_text, 12)
+    index.index_text(DOCUMENT_ID, "report.pdf", text)
+
+    results = index.search("Cash generated by operating activities")
+    assert [r["document_id"] for r in results] == [DOCUMENT_ID]
+    assert all("cash generated by operating activities" in " ".join(split_pages(text)[p].lower().split())
+               for p in results[0]["pages"])
+    assert index.search("operating cash generated") == []
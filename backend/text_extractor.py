@@ -9,13 +9,19 @@ import os
 import sys
 import logging
 import magic
-from typing import Dict, Callable, Set
+import zipfile
+from collections import deque
+from xml.etree import ElementTree
+from typing import Dict, Callable, Set, Iterator, NamedTuple, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 import pdfplumber
-from docx import Document
+from pdfminer.pdfdocument import PDFPasswordIncorrect
 import pytesseract
 from PIL import Image
 
+from deadline import Deadline
+
 # Configure logging for clear, standardized error and info messages
 logging.basicConfig(
     level=logging.INFO, 
@@ -25,6 +31,21 @@ logging.basicConfig(
 # --- Configuration Constants ---
 TABLE_SEPARATOR = "\t"
 OCR_RESOLUTION = 300
+# Message of the RuntimeError pytesseract raises when it kills tesseract on timeout
+TESSERACT_TIMEOUT = "Tesseract process timeout"
+# Per-page extraction stages that can be skipped when a deadline runs out
+STAGE_OCR = "ocr"
+STAGE_TABLES = "tables"
+STAGE_CONTENT = "content"  # The rest of a non-paged document (rows, paragraphs)
+# WordprocessingML element names used by the streaming DOCX extractor
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DOCX_PARAGRAPH, DOCX_TABLE, DOCX_ROW, DOCX_CELL = _W + "p", _W + "tbl", _W + "tr", _W + "tc"
+DOCX_RUN, DOCX_HYPERLINK, DOCX_TEXT, DOCX_BREAK = _W + "r", _W + "hyperlink", _W + "t", _W + "br"
+DOCX_GRID_BEFORE = _W + "gridBefore"
+DOCX_GRID_SPAN_PATH = f"{_W}tcPr/{_W}gridSpan"
+DOCX_VMERGE_PATH = f"{_W}tcPr/{_W}vMerge"
+DOCX_VAL, DOCX_TYPE = _W + "val", _W + "type"
+DOCX_RUN_SYMBOLS = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
 # --- MODIFIED: Added new MIME types ---
 MIME_TYPE_MAP = {
     'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': '.xlsx',
@@ -36,18 +57,35 @@ MIME_TYPE_MAP = {
     'image/png': '.png',
 }
 
+# A rendered page: a PIL image, or a NumPy view of one shared with an OCR worker
+Raster = Union[Image.Image, np.ndarray]
+
 class ExtractionError(Exception):
     """Custom exception for user-facing extraction failures."""
     pass
 
+class OCRTimeoutError(Exception):
+    """OCR stopped because the deadline ran out (a skipped stage, not a failure)."""
+    pass
+
+class PageChunk(NamedTuple):
+    """A unit of streamed extraction output: one page (or a whole non-paged file)."""
+    page_number: int
+    page_count: int
+    text: str
+    skipped: Tuple[str, ...] = ()  # Extraction stages skipped on this page (deadline)
+
 class TextExtractor:
     """
     Unified text extractor for various document formats.
     Designed for backend processing with security and robustness in mind.
     """
-    def __init__(self):
+    def __init__(self, ocr_pool=None):
+        # Optional OCRWorkerPool (ocr_workers.py): scanned pages are then OCR'd on
+        # worker processes while the following pages are read and rendered
+        self.ocr_pool = ocr_pool
         # --- MODIFIED: Added new extractors ---
-        self.extractors: Dict[str, Callable[[str], str]] = {
+        self.extractors: Dict[str, Callable[[str, Deadline], PageChunk]] = {
             '.xlsx': self._extract_from_excel,
             '.xls': self._extract_from_excel,
             '.pdf': self._extract_from_pdf,
@@ -73,116 +111,314 @@ class TextExtractor:
             logging.error(f"Could not determine MIME type for {file_path}: {e}")
             return ""
 
-    def _extract_from_excel(self, file_path: str) -> str:
+    @staticmethod
+    def _read_until(parts: Iterator[str], deadline: Deadline, file_path: str) -> PageChunk:
+        """
+        Joins the parts of a non-paged document into one chunk. Once the
+        deadline expires the rest is not read, and the chunk records
+        STAGE_CONTENT as skipped.
+        """
+        text_parts = []
+        parts = iter(parts)
+        while not deadline.expired():
+            part = next(parts, None)
+            if part is None:
+                return PageChunk(1, 1, "\n".join(text_parts))
+            text_parts.append(part)
+        logging.warning(f"Deadline reached: skipping the rest of {os.path.basename(file_path)}.")
+        return PageChunk(1, 1, "\n".join(text_parts), (STAGE_CONTENT,))
+
+    @staticmethod
+    def _iter_table_rows(df: pd.DataFrame) -> Iterator[str]:
+        """The non-empty rows of a sheet, cells joined by TABLE_SEPARATOR."""
+        for _, row in df.iterrows():
+            row_text = [str(cell).strip().replace('\n', ' ') for cell in row if pd.notna(cell)]
+            if row_text:
+                yield TABLE_SEPARATOR.join(row_text)
+
+    def _iter_excel_rows(self, file_path: str) -> Iterator[str]:
+        """Sheet headings and rows of an Excel file; each sheet is read when reached."""
+        excel_file = pd.ExcelFile(file_path)
+        for sheet_name in excel_file.sheet_names:
+            df = pd.read_excel(excel_file, sheet_name=sheet_name, header=None)
+            if df.empty:
+                continue
+            yield f"\n--- Sheet: {sheet_name} ---\n"
+            yield from self._iter_table_rows(df)
+
+    def _extract_from_excel(self, file_path: str, deadline: Deadline) -> PageChunk:
         """Extract text from Excel files, preserving sheet and row structure."""
         try:
-            text_parts = []
-            excel_file = pd.ExcelFile(file_path)
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(excel_file, sheet_name=sheet_name, header=None)
-                if df.empty:
-                    continue
-                text_parts.append(f"\n--- Sheet: {sheet_name} ---\n")
-                for _, row in df.iterrows():
-                    row_text = [str(cell).strip().replace('\n', ' ') for cell in row if pd.notna(cell)]
-                    if row_text:
-                        text_parts.append(TABLE_SEPARATOR.join(row_text))
-            return "\n".join(text_parts)
+            return self._read_until(self._iter_excel_rows(file_path), deadline, file_path)
         except Exception as e:
             raise ExtractionError(f"Failed to process Excel file {os.path.basename(file_path)}.") from e
 
     # --- NEW: CSV Extraction Method ---
-    def _extract_from_csv(self, file_path: str) -> str:
+    def _extract_from_csv(self, file_path: str, deadline: Deadline) -> PageChunk:
         """Extract text from CSV files, preserving row structure."""
         try:
             df = pd.read_csv(file_path, header=None)
-            if df.empty:
-                return ""
-            
-            text_parts = []
-            for _, row in df.iterrows():
-                row_text = [str(cell).strip().replace('\n', ' ') for cell in row if pd.notna(cell)]
-                if row_text:
-                    text_parts.append(TABLE_SEPARATOR.join(row_text))
-            return "\n".join(text_parts)
+            return self._read_until(self._iter_table_rows(df), deadline, file_path)
         except Exception as e:
             raise ExtractionError(f"Failed to process CSV file {os.path.basename(file_path)}.") from e
 
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text and tables from PDF files, with an OCR fallback."""
+    @staticmethod
+    def _ocr_image(image: Raster, deadline: Deadline) -> str:
+        """Run tesseract on a rendered page within the deadline; raises OCRTimeoutError once it runs out."""
+        if deadline.expired():
+            raise OCRTimeoutError("Deadline reached before OCR could run")
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(image)
+        try:
+            return pytesseract.image_to_string(image, timeout=deadline.remaining() or 0)
+        except RuntimeError as e:
+            # pytesseract kills tesseract and raises a plain RuntimeError on timeout;
+            # its TesseractError is a RuntimeError too, but a real OCR failure
+            if not isinstance(e, pytesseract.TesseractError) and (str(e) == TESSERACT_TIMEOUT or deadline.expired()):
+                raise OCRTimeoutError(str(e)) from None
+            raise
+
+    def _ocr_pdf_page(self, page, deadline: Deadline) -> str:
+        """OCR of a scanned page, rendered whole at OCR_RESOLUTION."""
+        return self._ocr_image(self._render_for_ocr(page), deadline)
+
+    @staticmethod
+    def _render_for_ocr(page) -> Image.Image:
+        """Render a page for OCR at OCR_RESOLUTION."""
+        return page.to_image(resolution=OCR_RESOLUTION).original
+
+    @staticmethod
+    def _needs_ocr(page_text: str) -> bool:
+        """A page with (almost) no text layer is treated as scanned."""
+        return len(page_text.strip()) < 20
+
+    def _extract_pdf_page(self, page, page_number: int, page_count: int, file_path: str,
+                          deadline: Optional[Deadline] = None, page_text: Optional[str] = None,
+                          ocr_future=None) -> PageChunk:
+        """
+        Extract the text and tables of a single PDF page, with an OCR fallback.
+        Once the deadline has expired, OCR and table extraction are skipped and
+        recorded in the chunk's `skipped` stages. When the page was already
+        submitted to the OCR worker pool, its text layer and OCR future are
+        passed in.
+        """
+        deadline = deadline or Deadline()
+        skipped = []
+        text_content = [f"\n--- Page {page_number}/{page_count} ---\n"]
+        if page_text is None:
+            page_text = page.extract_text() or ""
+
+        if self._needs_ocr(page_text):
+            if ocr_future is None and deadline.expired():
+                logging.warning(f"Deadline reached: skipping OCR on page {page_number} of {os.path.basename(file_path)}.")
+                skipped.append(STAGE_OCR)
+                text_content.append(page_text)
+            else:
+                logging.info(f"Page {page_number} of {os.path.basename(file_path)} has minimal text. Attempting OCR.")
+                try:
+                    if ocr_future is not None:
+                        ocr_text = ocr_future.result()
+                    else:
+                        ocr_text = self._ocr_pdf_page(page, deadline)
+                    if ocr_text.strip():
+                        text_content.append("\n--- OCR Extracted Text (Scanned Page) ---\n")
+                        text_content.append(ocr_text)
+                    else:
+                        text_content.append("[Warning: Page appears to be blank or an image with no text found by OCR.]")
+                except OCRTimeoutError as ocr_timeout:
+                    logging.warning(f"OCR on page {page_number} of {file_path} hit the deadline: {ocr_timeout}")
+                    skipped.append(STAGE_OCR)
+                    text_content.append(page_text)
+                except Exception as ocr_error:
+                    logging.error(f"OCR failed on page {page_number} of {file_path}: {ocr_error}")
+                    text_content.append("[Error: OCR processing failed for this page.]")
+        else:
+            text_content.append(page_text)
+
+        if deadline.expired():
+            skipped.append(STAGE_TABLES)
+        else:
+            tables = page.extract_tables()
+            if tables:
+                text_content.append("\n--- Tables on Page ---")
+                for table in tables:
+                    text_content.append("\n-- Table Start --\n")
+                    for row in table:
+                        clean_row = [str(cell).strip().replace('\n', ' ') if cell is not None else "" for cell in row]
+                        text_content.append(TABLE_SEPARATOR.join(clean_row))
+                    text_content.append("\n-- Table End --\n")
+        return PageChunk(page_number, page_count, "\n".join(text_content), tuple(skipped))
+
+    def _iter_pdf_pages(self, file_path: str, deadline: Optional[Deadline] = None) -> Iterator[PageChunk]:
+        """
+        Lazily extract a PDF page by page. Each page's cached layout objects
+        are released as soon as its chunk is produced, so memory stays flat
+        regardless of the page count.
+        """
         try:
-            text_content = []
             with pdfplumber.open(file_path) as pdf:
+                page_count = len(pdf.pages)
+                if self.ocr_pool is not None:
+                    yield from self._iter_pdf_pages_pooled(pdf, page_count, file_path, deadline or Deadline())
+                    return
                 for i, page in enumerate(pdf.pages, 1):
-                    text_content.append(f"\n--- Page {i}/{len(pdf.pages)} ---\n")
-                    page_text = page.extract_text() or ""
-                    
-                    if len(page_text.strip()) < 20:
-                        logging.info(f"Page {i} of {os.path.basename(file_path)} has minimal text. Attempting OCR.")
-                        try:
-                            img = page.to_image(resolution=OCR_RESOLUTION)
-                            ocr_text = pytesseract.image_to_string(img.original)
-                            if ocr_text.strip():
-                                text_content.append("\n--- OCR Extracted Text (Scanned Page) ---\n")
-                                text_content.append(ocr_text)
-                            else:
-                                text_content.append("[Warning: Page appears to be blank or an image with no text found by OCR.]")
-                        except Exception as ocr_error:
-                            logging.error(f"OCR failed on page {i} of {file_path}: {ocr_error}")
-                            text_content.append("[Error: OCR processing failed for this page.]")
-                    else:
-                        text_content.append(page_text)
-
-                    tables = page.extract_tables()
-                    if tables:
-                        text_content.append("\n--- Tables on Page ---")
-                        for table in tables:
-                            text_content.append("\n-- Table Start --\n")
-                            for row in table:
-                                clean_row = [str(cell).strip().replace('\n', ' ') if cell is not None else "" for cell in row]
-                                text_content.append(TABLE_SEPARATOR.join(clean_row))
-                            text_content.append("\n-- Table End --\n")
-            return "\n".join(text_content)
-        except pdfplumber.errors.PasswordRequired:
-            raise ExtractionError("PDF file is password-protected.")
+                    try:
+                        yield self._extract_pdf_page(page, i, page_count, file_path, deadline)
+                    finally:
+                        page.close()
         except Exception as e:
+            # pdfplumber wraps pdfminer's password error in its own exception type
+            if isinstance(e, PDFPasswordIncorrect) or (e.args and isinstance(e.args[0], PDFPasswordIncorrect)):
+                raise ExtractionError("PDF file is password-protected.")
             raise ExtractionError(f"Failed to process PDF file {os.path.basename(file_path)}.") from e
 
-    def _extract_from_docx(self, file_path: str) -> str:
-        """Extract text and tables from DOCX files."""
+    def _iter_pdf_pages_pooled(self, pdf, page_count: int, file_path: str, deadline: Deadline) -> Iterator[PageChunk]:
+        """
+        Page iteration with OCR on the worker pool. Scanned pages are rendered
+        and submitted as they are reached, and chunks are still yielded in page
+        order; at most one page per raster slot is held open ahead of the
+        page being yielded.
+        """
+        pending = deque()  # (page number, page, text layer, OCR future or None)
+
+        def finish(entry) -> PageChunk:
+            page_number, page, page_text, ocr_future = entry
+            try:
+                return self._extract_pdf_page(page, page_number, page_count, file_path, deadline, page_text, ocr_future)
+            finally:
+                page.close()
+
+        try:
+            for i, page in enumerate(pdf.pages, 1):
+                page_text = page.extract_text() or ""
+                ocr_future = None
+                if self._needs_ocr(page_text) and not deadline.expired():
+                    ocr_future = self.ocr_pool.submit(self._render_for_ocr(page), deadline)
+                pending.append((i, page, page_text, ocr_future))
+                while pending and (len(pending) > self.ocr_pool.slots
+                                   or pending[0][3] is None or pending[0][3].done()):
+                    yield finish(pending.popleft())
+            while pending:
+                yield finish(pending.popleft())
+        finally:
+            # Stopped early: drop OCR work nobody will read
+            for _, page, _, ocr_future in pending:
+                if ocr_future is not None:
+                    ocr_future.cancel()
+                page.close()
+
+    def _extract_from_pdf(self, file_path: str, deadline: Deadline) -> PageChunk:
+        """Extract text and tables from PDF files, with an OCR fallback, as one chunk."""
+        chunks = list(self._iter_pdf_pages(file_path, deadline))
+        skipped = tuple(sorted({stage for chunk in chunks for stage in chunk.skipped}))
+        return PageChunk(1, 1, "\n".join(chunk.text for chunk in chunks), skipped)
+
+    @staticmethod
+    def _docx_paragraph_text(paragraph) -> str:
+        """Text of a <w:p>: its runs and hyperlink runs, with tabs and breaks mapped."""
+        parts = []
+        for child in paragraph:
+            runs = child.iterfind(DOCX_RUN) if child.tag == DOCX_HYPERLINK else [child] if child.tag == DOCX_RUN else []
+            for run in runs:
+                for item in run:
+                    if item.tag == DOCX_TEXT:
+                        parts.append(item.text or "")
+                    elif item.tag == DOCX_BREAK:
+                        parts.append("\n" if item.get(DOCX_TYPE, "textWrapping") == "textWrapping" else "")
+                    elif item.tag in DOCX_RUN_SYMBOLS:
+                        parts.append(DOCX_RUN_SYMBOLS[item.tag])
+        return "".join(parts)
+
+    def _iter_docx_blocks(self, file_path: str) -> Iterator[str]:
+        """
+        Stream the body of a DOCX in document order, yielding paragraphs and
+        table rows as they close. `word/document.xml` is read with iterparse
+        and every finished element is detached from its parent, so memory
+        stays flat no matter how many tables the document holds.
+        """
+        with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml_file:
+            stack = []
+            table_depth = 0
+            cell_paragraphs = []
+            row_cells = []             # (grid column, span, text) of the current row
+            previous_row = {}          # grid column -> text, for vertically merged cells
+            grid_column = 0
+            for event, elem in ElementTree.iterparse(xml_file, events=("start", "end")):
+                if event == "start":
+                    stack.append(elem)
+                    if elem.tag == DOCX_TABLE:
+                        table_depth += 1
+                        if table_depth == 1:
+                            previous_row = {}
+                            yield "\n-- Table Start --\n"
+                    elif elem.tag == DOCX_ROW and table_depth == 1:
+                        row_cells = []
+                        grid_column = 0
+                    continue
+
+                stack.pop()
+                if elem.tag == DOCX_PARAGRAPH:
+                    if any(parent.tag == DOCX_PARAGRAPH for parent in stack):
+                        continue  # Text boxes nested in a paragraph are not body text
+                    if table_depth == 0:
+                        text = self._docx_paragraph_text(elem)
+                        if text.strip():
+                            yield text
+                    elif table_depth == 1:
+                        cell_paragraphs.append(self._docx_paragraph_text(elem))
+                elif elem.tag == DOCX_CELL and table_depth == 1:
+                    span_elem = elem.find(DOCX_GRID_SPAN_PATH)
+                    span = int(span_elem.get(DOCX_VAL, "1")) if span_elem is not None else 1
+                    merge = elem.find(DOCX_VMERGE_PATH)
+                    if merge is not None and merge.get(DOCX_VAL, "continue") == "continue":
+                        # Continuation of a vertical merge: repeat the cell above
+                        text = previous_row.get(grid_column, "")
+                    else:
+                        text = "\n".join(cell_paragraphs).strip().replace('\n', ' ')
+                    row_cells.append((grid_column, span, text))
+                    grid_column += span
+                    cell_paragraphs = []
+                elif elem.tag == DOCX_GRID_BEFORE and table_depth == 1:
+                    grid_column += int(elem.get(DOCX_VAL, "0"))
+                elif elem.tag == DOCX_ROW and table_depth == 1:
+                    previous_row = {column: text for column, _, text in row_cells}
+                    yield TABLE_SEPARATOR.join(text for _, span, text in row_cells for _ in range(span))
+                elif elem.tag == DOCX_TABLE:
+                    table_depth -= 1
+                    if table_depth == 0:
+                        yield "\n-- Table End --\n"
+                else:
+                    continue
+
+                # The element has been consumed: detach it so the tree never grows
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+
+    def _extract_from_docx(self, file_path: str, deadline: Deadline) -> PageChunk:
+        """Extract paragraphs and tables from DOCX files, in document order."""
         try:
-            doc = Document(file_path)
-            text_parts = []
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    text_parts.append(para.text)
-            
-            if doc.tables:
-                text_parts.append("\n--- Tables ---")
-                for table in doc.tables:
-                    text_parts.append("\n-- Table Start --\n")
-                    for row in table.rows:
-                        row_text = [cell.text.strip().replace('\n', ' ') for cell in row.cells]
-                        text_parts.append(TABLE_SEPARATOR.join(row_text))
-                    text_parts.append("\n-- Table End --\n")
-            return "\n".join(text_parts)
+            return self._read_until(self._iter_docx_blocks(file_path), deadline, file_path)
         except Exception as e:
             raise ExtractionError(f"Failed to process DOCX file {os.path.basename(file_path)}.") from e
 
     # --- NEW: Image OCR Extraction Method ---
-    def _extract_from_image(self, file_path: str) -> str:
+    def _extract_from_image(self, file_path: str, deadline: Deadline) -> PageChunk:
         """Extract text from image files using OCR."""
         try:
             logging.info(f"Performing OCR on image file {os.path.basename(file_path)}...")
-            text = pytesseract.image_to_string(Image.open(file_path))
-            return text
+            with Image.open(file_path) as image:
+                return PageChunk(1, 1, self._ocr_image(image, deadline))
+        except OCRTimeoutError as ocr_timeout:
+            logging.warning(f"OCR on image file {os.path.basename(file_path)} hit the deadline: {ocr_timeout}")
+            return PageChunk(1, 1, "", (STAGE_OCR,))
         except Exception as e:
             raise ExtractionError(f"Failed to perform OCR on image file {os.path.basename(file_path)}.") from e
 
-    def extract_text(self, file_path: str) -> str:
-        """Main public method. Validates and extracts text from a supported file."""
+    def _resolve_format(self, file_path: str) -> str:
+        """Validates a file and returns its format, raising ExtractionError if unusable."""
         if not os.path.exists(file_path):
-            return f"[Error: File not found at path: {file_path}]"
+            raise ExtractionError(f"File not found at path: {file_path}")
 
         file_format = self._get_file_format_from_mime(file_path)
         if not file_format:
@@ -190,14 +426,31 @@ class TextExtractor:
             _, ext = os.path.splitext(file_path)
             file_format = ext.lower()
 
-        extractor_func = self.extractors.get(file_format)
-        if not extractor_func:
+        if file_format not in self.extractors:
             # --- MODIFIED: Updated error message ---
-            return "[Error: Unsupported file format. Please upload a XLSX, XLS, PDF, DOCX, CSV, PNG, or JPG/JPEG file.]"
+            raise ExtractionError("Unsupported file format. Please upload a XLSX, XLS, PDF, DOCX, CSV, PNG, or JPG/JPEG file.")
+        return file_format
 
+    def iter_text(self, file_path: str, deadline: Optional[Deadline] = None) -> Iterator[PageChunk]:
+        """
+        Streaming public method. Yields the document as page chunks; PDFs are
+        extracted lazily page by page, other formats as a single chunk.
+        Once an optional deadline is spent, OCR and tables are skipped, and
+        the rest of a non-paged document is not read.
+        Raises ExtractionError on user-facing failures.
+        """
+        deadline = deadline or Deadline()
+        file_format = self._resolve_format(file_path)
         logging.info(f"Extracting text from '{os.path.basename(file_path)}' using {file_format} extractor...")
+        if file_format == '.pdf':
+            yield from self._iter_pdf_pages(file_path, deadline)
+        else:
+            yield self.extractors[file_format](file_path, deadline)
+
+    def extract_text(self, file_path: str, deadline: Optional[Deadline] = None) -> str:
+        """Main public method. Validates and extracts text from a supported file."""
         try:
-            return extractor_func(file_path)
+            return "\n".join(chunk.text for chunk in self.iter_text(file_path, deadline))
         except ExtractionError as e:
             logging.error(f"Extraction failed for {os.path.basename(file_path)}: {e}")
             return f"[Error: {e}]"
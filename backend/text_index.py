@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+On-disk inverted index over extracted document text, with positional
+postings per page, backed by SQLite.
+
+Usage:
+    python text_index.py build [--artifacts DIR] [--index FILE]
+    python text_index.py search "cash generated by operating activities" [--index FILE] [--limit N]
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from artifact_store import ArtifactStore, ARTIFACT_ROOT
+from financial_parser import STATEMENT_SECTIONS
+
+# ==============================================================================
+# CONFIGURATION & CONSTANTS
+# ==============================================================================
+
+INDEX_PATH = os.environ.get("FINSIGHT_INDEX_PATH", os.path.join(ARTIFACT_ROOT, "search_index.sqlite3"))
+DEFAULT_SEARCH_LIMIT = 100
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+PAGE_MARKER = re.compile(r"\n--- Page (\d+)/(\d+) ---\n")
+
+# Phrases that open each financial statement, derived from the parser's section patterns
+STATEMENT_PHRASES = {
+    name: re.sub(r"\\s\+", " ", start).lower() for name, start, _, _, _ in STATEMENT_SECTIONS
+}
+# The parser's own heading patterns, to confirm the pages skipped hold none
+STATEMENT_HEADINGS = [re.compile(start, re.IGNORECASE) for _, start, _, _, _ in STATEMENT_SECTIONS]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc INTEGER PRIMARY KEY,
+    document_id TEXT UNIQUE NOT NULL,
+    filename TEXT,
+    page_count INTEGER NOT NULL,
+    text_digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term_id INTEGER PRIMARY KEY,
+    term TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (term_id, doc, page)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_doc ON postings (doc);
+"""
+
+# ==============================================================================
+# TEXT HELPERS
+# ==============================================================================
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def split_pages(text: str) -> Dict[int, str]:
+    """
+    Splits extracted text on the extractor's page markers into
+    {page number: text}; concatenating every page in order gives the text
+    back. Text without markers is a single page 1.
+    """
+    parts = PAGE_MARKER.split(text)
+    if len(parts) == 1:
+        return {1: text}
+    # parts = [preamble, number, count, body, number, count, body, ...]
+    pages = {int(parts[i]): f"\n--- Page {parts[i]}/{parts[i + 1]} ---\n{parts[i + 2]}"
+             for i in range(1, len(parts), 3)}
+    first = int(parts[1])
+    pages[first] = parts[0] + pages[first]
+    return pages
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+# ==============================================================================
+# INDEX
+# ==============================================================================
+
+class TextIndex:
+    """
+    Inverted index: term -> (document, page) -> positions of the term on that
+    page. Phrase queries intersect the postings of their terms, rarest first,
+    and check that the positions are consecutive.
+    """
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # --- Indexing ---
+
+    def has_document(self, document_id: str, text: Optional[str] = None) -> bool:
+        """True if the document is indexed (from exactly this text, when given)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text_digest FROM documents WHERE document_id = ?", (document_id,)
+            ).fetchone()
+        return row is not None and (text is None or row[0] == text_digest(text))
+
+    def index_text(self, document_id: str, filename: str, text: str) -> None:
+        """(Re)indexes a document's extracted text, page by page."""
+        pages = split_pages(text)
+        postings: Dict[Tuple[str, int], array] = defaultdict(lambda: array("I"))
+        for page, page_text in pages.items():
+            for position, term in enumerate(tokenize(page_text)):
+                postings[(term, page)].append(position)
+
+        with self._lock, self._conn:
+            self._remove(document_id)
+            doc = self._conn.execute(
+                "INSERT INTO documents (document_id, filename, page_count, text_digest) VALUES (?, ?, ?, ?)",
+                (document_id, filename, max(pages), text_digest(text))
+            ).lastrowid
+            terms = sorted({term for term, _ in postings})
+            self._conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", [(t,) for t in terms])
+            term_ids = self._term_ids(terms)
+            self._conn.executemany(
+                "INSERT INTO postings (term_id, doc, page, positions) VALUES (?, ?, ?, ?)",
+                [(term_ids[term], doc, page, positions.tobytes()) for (term, page), positions in postings.items()]
+            )
+
+    def remove_document(self, document_id: str) -> None:
+        with self._lock, self._conn:
+            self._remove(document_id)
+
+    def _remove(self, document_id: str) -> None:
+        row = self._conn.execute("SELECT doc FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM postings WHERE doc = ?", row)
+            self._conn.execute("DELETE FROM documents WHERE doc = ?", row)
+
+    def _term_ids(self, terms: List[str]) -> Dict[str, int]:
+        term_ids = {}
+        for i in range(0, len(terms), 500):  # Stay below SQLite's bound-parameter limit
+            chunk = terms[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            term_ids.update(self._conn.execute(
+                f"SELECT term, term_id FROM terms WHERE term IN ({placeholders})", chunk
+            ).fetchall())
+        return term_ids
+
+    # --- Queries ---
+
+    def _phrase_hits(self, phrase: str, document_id: Optional[str] = None) -> Dict[int, Set[int]]:
+        """{doc: pages} where the phrase occurs (all its terms, consecutively)."""
+        terms = tokenize(phrase)
+        if not terms:
+            return {}
+        with self._lock:
+            term_ids = self._term_ids(sorted(set(terms)))
+            if len(term_ids) < len(set(terms)):
+                return {}
+            doc_filter, params = "", []
+            if document_id is not None:
+                doc_filter, params = " AND doc = (SELECT doc FROM documents WHERE document_id = ?)", [document_id]
+
+            # Rarest term first, so the candidate set shrinks as fast as possible
+            frequency = {
+                term: self._conn.execute("SELECT COUNT(*) FROM postings WHERE term_id = ?" + doc_filter,
+                                         [term_ids[term], *params]).fetchone()[0]
+                for term in set(terms)
+            }
+            offsets = defaultdict(list)  # term -> its offsets within the phrase
+            for offset, term in enumerate(terms):
+                offsets[term].append(offset)
+
+            candidates: Optional[Dict[Tuple[int, int], Set[int]]] = None  # (doc, page) -> phrase start positions
+            for term in sorted(offsets, key=frequency.get):
+                rows = self._conn.execute(
+                    "SELECT doc, page, positions FROM postings WHERE term_id = ?" + doc_filter,
+                    [term_ids[term], *params]
+                )
+                matches = {}
+                for doc, page, blob in rows:
+                    key = (doc, page)
+                    if candidates is not None and key not in candidates:
+                        continue
+                    positions = array("I")
+                    positions.frombytes(blob)
+                    # A term repeated in the phrase must occur at each of its offsets
+                    starts = None
+                    for offset in offsets[term]:
+                        at_offset = {p - offset for p in positions if p >= offset}
+                        starts = at_offset if starts is None else starts & at_offset
+                    if candidates is not None:
+                        starts &= candidates[key]
+                    if starts:
+                        matches[key] = starts
+                candidates = matches
+                if not candidates:
+                    return {}
+
+        hits: Dict[int, Set[int]] = defaultdict(set)
+        for doc, page in candidates:
+            hits[doc].add(page)
+        return hits
+
+    def search(self, phrase: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Dict]:
+        """Documents containing the phrase, with the pages it appears on."""
+        hits = self._phrase_hits(phrase)
+        if not hits:
+            return []
+        docs = sorted(hits)[:limit]
+        with self._lock:
+            placeholders = ",".join("?" * len(docs))
+            rows = self._conn.execute(
+                f"SELECT doc, document_id, filename FROM documents WHERE doc IN ({placeholders})", docs
+            ).fetchall()
+        return [
+            {"document_id": document_id, "filename": filename, "pages": sorted(hits[doc])}
+            for doc, document_id, filename in rows
+        ]
+
+    def statement_pages(self, document_id: str, text: str) -> Optional[List[int]]:
+        """
+        Pages the parser needs from an indexed document: from the first page
+        with a statement heading to the end of the text. Each statement runs
+        until the next one's heading, and the last (cash flow) runs to the end
+        of the text, so the parser reads nothing before that first heading.
+        None when the index does not match `text`, no heading is indexed, or
+        the pages before the first indexed heading do hold one (e.g. glued to
+        a neighbouring word); the caller should then parse the whole text.
+        """
+        if not self.has_document(document_id, text):
+            return None
+        heading_pages = set()
+        for phrase in STATEMENT_PHRASES.values():
+            for pages in self._phrase_hits(phrase, document_id).values():
+                heading_pages.update(pages)
+        if not heading_pages:
+            return None
+
+        by_page = split_pages(text)
+        first = min(heading_pages)
+        skipped = "".join(page_text for page, page_text in by_page.items() if page < first)
+        if any(heading.search(skipped) for heading in STATEMENT_HEADINGS):
+            return None
+        return sorted(page for page in by_page if page >= first)
+
+
+def select_pages(text: str, pages: List[int]) -> str:
+    """The extracted text of the given pages only, in page order."""
+    by_page = split_pages(text)
+    return "".join(by_page[page] for page in pages if page in by_page)
+
+# ==============================================================================
+# COMMAND LINE
+# ==============================================================================
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="Build or query the extracted-text search index.")
+    arg_parser.add_argument("--index", default=INDEX_PATH, help="Index database file")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Index the extracted text of every stored document")
+    build.add_argument("--artifacts", default=ARTIFACT_ROOT, help="Artifact store directory")
+    search = commands.add_parser("search", help="Find documents and pages containing a phrase")
+    search.add_argument("phrase")
+    search.add_argument("--limit", type=int, default=DEFAULT_SEARCH_LIMIT)
+    args = arg_parser.parse_args()
+
+    index = TextIndex(args.index)
+    start_time = time.perf_counter()
+    if args.command == "build":
+        store = ArtifactStore(args.artifacts)
+        indexed = 0
+        for document_id in store.list_documents():
+            text = store.load_text(document_id)
+            if text is None or index.has_document(document_id, text):
+                continue
+            index.index_text(document_id, store.load_metadata(document_id).get("filename", ""), text)
+            indexed += 1
+        print(f"✅ Indexed {indexed} documents in {time.perf_counter() - start_time:.2f}s")
+    else:
+        results = index.search(args.phrase, args.limit)
+        for result in results:
+            print(f"{result['document_id']}  {result['filename']}  pages {', '.join(map(str, result['pages']))}")
+        print(f"✅ {len(results)} documents in {(time.perf_counter() - start_time) * 1000:.1f}ms")
+    index.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# backend/time_series.py
+
+import warnings
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from financial_parser import METRIC_SCHEMA, PeriodRecord
+
+# ==============================================================================
+# CONFIGURATION & CONSTANTS
+# ==============================================================================
+
+PERIOD_TYPES = ("annual", "quarter", "snapshot")
+
+# Bucket aggregations for downsampling; all ignore missing (NaN) values
+AGGREGATIONS = {
+    "mean": np.nanmean,
+    "sum": np.nansum,
+    "min": np.nanmin,
+    "max": np.nanmax,
+    "last": lambda bucket: bucket[~np.isnan(bucket)][-1] if (~np.isnan(bucket)).any() else np.nan,
+}
+DEFAULT_AGGREGATION = "last"
+
+# ==============================================================================
+# COLUMNAR SERIES
+# ==============================================================================
+
+def build_columns(records: Sequence[Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Pivots per-period records (dicts or PeriodRecords) into one column set per
+    period type: a sorted `years` array and a float array per metric (NaN for
+    periods that do not report it).
+    """
+    by_type: Dict[str, Dict[int, PeriodRecord]] = {}
+    for record in records:
+        if not isinstance(record, PeriodRecord):
+            record = PeriodRecord.from_dict(record)
+        by_type.setdefault(record.period_type, {})[record.year] = record
+
+    columns = {}
+    for period_type in sorted(by_type, key=lambda t: PERIOD_TYPES.index(t) if t in PERIOD_TYPES else len(PERIOD_TYPES)):
+        periods = by_type[period_type]
+        years = np.array(sorted(periods), dtype=np.int64)
+        matrix = np.array([periods[year].values for year in years], dtype=np.float64).reshape(len(years), len(METRIC_SCHEMA))
+        columns[period_type] = {
+            "years": years,
+            "metrics": {metric: matrix[:, i] for i, metric in enumerate(METRIC_SCHEMA)},
+        }
+    return columns
+
+
+def downsample(years: np.ndarray, values: Dict[str, np.ndarray], max_points: int,
+               aggregation: str = DEFAULT_AGGREGATION):
+    """
+    Reduces a long history to at most `max_points` contiguous buckets. Each
+    bucket is labelled with its last year and aggregated per metric.
+    """
+    if len(years) <= max_points:
+        return years, values
+    aggregate = AGGREGATIONS[aggregation]
+    boundaries = np.array_split(np.arange(len(years)), max_points)
+    bucket_years = np.array([years[bucket[-1]] for bucket in boundaries])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN buckets yield NaN
+        bucketed = {
+            metric: np.array([aggregate(series[bucket]) for bucket in boundaries], dtype=np.float64)
+            for metric, series in values.items()
+        }
+    if aggregation == "sum":
+        # nansum returns 0 for an all-missing bucket; keep it missing instead
+        for metric, series in values.items():
+            present = np.array([(~np.isnan(series[bucket])).any() for bucket in boundaries])
+            bucketed[metric][~present] = np.nan
+    return bucket_years, bucketed
+
+
+def _to_json_list(array: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(v) else float(v) for v in array.tolist()]
+
+
+def build_series_payload(
+    records: Sequence[Any],
+    metrics: Optional[List[str]] = None,
+    period_types: Optional[List[str]] = None,
+    max_points: Optional[int] = None,
+    aggregation: str = DEFAULT_AGGREGATION,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    JSON-ready columnar series: {period_type: {"years": [...], "metrics":
+    {metric: [...]}}}. Metrics no period reports are omitted; unknown metric
+    or period type names and aggregations raise ValueError.
+    """
+    if metrics:
+        unknown = [m for m in metrics if m not in METRIC_SCHEMA]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+    if period_types:
+        unknown = [t for t in period_types if t not in PERIOD_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown period types: {', '.join(unknown)}. Expected: {', '.join(PERIOD_TYPES)}")
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation '{aggregation}'. Expected one of: {', '.join(AGGREGATIONS)}")
+
+    payload = {}
+    for period_type, column_set in build_columns(records).items():
+        if period_types and period_type not in period_types:
+            continue
+        values = {
+            metric: series for metric, series in column_set["metrics"].items()
+            if (not metrics or metric in metrics) and not np.isnan(series).all()
+        }
+        years = column_set["years"]
+        if max_points is not None:
+            years, values = downsample(years, values, max_points, aggregation)
+        payload[period_type] = {
+            "years": years.tolist(),
+            "metrics": {metric: _to_json_list(series) for metric, series in values.items()},
+        }
+    return payload
@@ -21,6 +21,7 @@ function App() {
 
   // --- NEW STATE FOR API DATA ---
   const [financialData, setFinancialData] = useState(null);
+  const [seriesData, setSeriesData] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState(null);
   // -----------------------------
@@ -38,6 +39,7 @@ function App() {
     setIsLoading(true);
     setError(null);
     setFinancialData(null); // Clear previous data
+    setSeriesData(null);
 
     const formData = new FormData();
     formData.append('file', file);
@@ -57,6 +59,15 @@ function App() {
       setFinancialData(data); // Store the entire JSON response in state
       console.log('API Response:', data);
 
+      // Chart data comes pre-pivoted (and downsampled) from the backend
+      const seriesResponse = await fetch(
+        `http://localhost:5001/api/results/${data.document_id}/series?period_types=annual&max_points=40`
+      );
+      if (seriesResponse.ok) {
+        const seriesJson = await seriesResponse.json();
+        setSeriesData(seriesJson.series);
+      }
+
     } catch (e) {
       console.error('Error uploading or processing file:', e);
       setError('Failed to process the document. Please try again.');
@@ -92,8 +103,8 @@ function App() {
 
             <section id="upload-section-id" ref={uploadSectionRef} className="dashboard-layout">
               <UploadSection onFileSelected={handleFileSelected} />
-              {/* Pass raw data to chart, only if it exists */}
-              <ChartComponent chartData={financialData ? financialData.raw_parsed_data : null} />
+              {/* Pass the columnar series to the chart, only if it exists */}
+              <ChartComponent chartData={seriesData} />
             </section>
 
             {/* --- DYNAMICALLY RENDER SECTIONS BASED ON API RESPONSE --- */}
@@ -2,13 +2,16 @@ import React, { useEffect, useRef, useState, useCallback, useMemo } from 'react'
 // Note: Tailwind CSS classes are assumed to be available in the React environment.
 
 // The main component, which contains all logic and rendering for the graph.
-const ChartComponent = () => {
+const ChartComponent = ({ chartData }) => {
     const canvasRef = useRef(null);
 
     // --- CONFIGURATION START ---
 
+    // Annual net sales from the backend's columnar series, when available
+    const seriesValues = chartData?.annual?.metrics?.total_net_sales?.filter((v) => v !== null);
+
     // Simulated financial data (Y-values). Values scaled for steepness.
-    const historicalData = useMemo(() => [
+    const historicalData = useMemo(() => seriesValues && seriesValues.length > 1 ? seriesValues : [
         0,      // START: Explicitly starting at 0 for a baseline
         500, 800, 1500, 
         950, 750, 850, 
@@ -18,7 +21,7 @@ const ChartComponent = () => {
         // Smaller but still sharp drop
         1100, 
         1400, 1700, 2000, 900, 1700, 3500, 4000, 6000 // Very steep final growth
-    ], []);
+    ], [seriesValues?.join(',')]); // eslint-disable-line react-hooks/exhaustive-deps
 
     // --- Dynamic Speed Calculation for 5-second duration (Faster loop) ---
     const targetDurationSeconds = 15;